@@ -3,15 +3,32 @@ import json
 import time
 import hashlib
 import base64
-from typing import Dict, Any, List, Optional
+import re
+import math
+import unicodedata
+import zlib
+import queue
+import sqlite3
+import threading
+import uuid
+import secrets
+import sys
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Callable
 import logging
+import logging.handlers
+import atexit
+import contextvars
 import random
+import asyncio
 
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Header, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, field_validator
-import requests
+import httpx
 
 try:
     import numpy as np
@@ -20,6 +37,9 @@ except ImportError:
 
 try:
     from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
     CRYPTO_AVAILABLE = True
 except ImportError:
     CRYPTO_AVAILABLE = False
@@ -32,6 +52,8 @@ except ImportError:
 
 try:
     from web3 import Web3
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
@@ -42,12 +64,190 @@ try:
 except ImportError:
     STRIPE_AVAILABLE = False
 
-from contextlib import asynccontextmanager
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, suppress
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_HOT_PATH_RATE = float(os.getenv("LOG_HOT_PATH_RATE", "10"))
+LOG_HOT_PATH_BURST = int(os.getenv("LOG_HOT_PATH_BURST", "20"))
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request id; runs on the calling thread before the record is queued, where the contextvar is still set"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class HotPathFilter(logging.Filter):
+    """Token bucket per message template; suppressed counts ride along on the next record that gets through"""
+
+    def __init__(self, rate: float = LOG_HOT_PATH_RATE, burst: int = LOG_HOT_PATH_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.buckets: Dict[str, List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        bucket = self.buckets.get(record.msg)
+        if bucket is None:
+            bucket = self.buckets[record.msg] = [float(self.burst), now, 0]
+
+        tokens = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            bucket[2] += 1
+            return False
+
+        bucket[0] = tokens - 1.0
+        if bucket[2]:
+            record.suppressed = int(bucket[2])
+            bucket[2] = 0
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; anything passed via extra= becomes a top-level field"""
+
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """BASIC_FORMAT plus the request id, with extra= fields (stage durations etc.) appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(levelname)s:%(name)s:%(request_id)s:%(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        line = super().format(record)
+        extras = [f"{key}={value}" for key, value in record.__dict__.items() if key not in JsonFormatter.RESERVED]
+        return f"{line} {' '.join(extras)}" if extras else line
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them; the listener thread does the formatting and I/O. Never blocks: drops when full"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+log_listener: Optional[logging.handlers.QueueListener] = None
+log_handler: Optional[logging.Handler] = None
+
+def configure_logging(log_format: str = LOG_FORMAT, use_queue: bool = LOG_ASYNC, stream=None, level: str = LOG_LEVEL) -> logging.Handler:
+    """(Re)install the root handler: formatting and writes happen on a listener thread when use_queue is set"""
+    global log_listener, log_handler
+    if log_listener:
+        log_listener.stop()
+        log_listener = None
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+
+    target = logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    if use_queue:
+        handler = DeferredQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        log_listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+        log_listener.start()
+    else:
+        handler = target
+
+    handler.addFilter(RequestIdFilter())
+    root.addHandler(handler)
+    root.setLevel(level)
+    # httpx logs a line per request (one per OpenRouter call); only its problems are worth keeping
+    logging.getLogger("httpx").setLevel(max(logging.WARNING, root.level))
+    log_handler = handler
+    return handler
+
+class StageTimer:
+    """Wall-clock duration of consecutive request stages, in milliseconds"""
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
 
-logging.basicConfig(level=logging.INFO)
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = round((now - self.last) * 1000, 3)
+        self.last = now
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware: assigns a request id (or honours X-Request-ID) and echoes it on the response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = next((value.decode("latin-1")[:64] for name, value in scope["headers"] if name == b"x-request-id"), None)
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+def stop_log_listener():
+    """Drain queued records on interpreter exit"""
+    if log_listener:
+        log_listener.stop()
+
+configure_logging()
+atexit.register(stop_log_listener)
 logger = logging.getLogger(__name__)
+# Per-request messages go through a rate-limited child logger so bursts cannot flood the sink
+hot_logger = logging.getLogger(f"{__name__}.hot")
+hot_logger.addFilter(HotPathFilter())
 logging.getLogger("uvicorn.access").disabled = True
 
+openrouter_client: Optional[httpx.AsyncClient] = None
+
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     # Startup
@@ -66,10 +266,58 @@ async def lifespan(_: FastAPI):
     logger.info("🌐 Web3 integration ready")
     logger.info("🎯 All milestone demos are functional")
 
+    if NEAR_DUPLICATE_ENABLED:
+        restored = near_duplicate_index.load_from_redis()
+        if restored:
+            logger.info(f"♻️  Near-duplicate index restored {restored} fingerprints from Redis")
+
+    global receipt_store
+    if RECEIPT_STORE_ENABLED and receipt_store is None:
+        try:
+            receipt_store = await asyncio.to_thread(ReceiptStore)
+        except Exception as e:
+            logger.warning(f"⚠️ Receipt store disabled: {e}")
+    if receipt_store:
+        loaded = await asyncio.to_thread(receipt_store.load_bloom)
+        logger.info(f"🧾 Receipt store ready ({loaded} receipts indexed)")
+
+    global openrouter_client
+    openrouter_client = httpx.AsyncClient(
+        base_url=OPENROUTER_BASE_URL,
+        timeout=httpx.Timeout(OPENROUTER_TIMEOUT, connect=min(OPENROUTER_TIMEOUT, 3.0))
+    )
+
+    webhook_task = None
+    if stripe_gateway:
+        webhook_task = asyncio.create_task(stripe_gateway.process_events())
+
+    anchor_task = None
+    if receipt_anchor:
+        anchor_task = asyncio.create_task(receipt_anchor.run())
+        logger.info(f"⛓️  Receipt anchoring every {receipt_anchor.interval:.0f}s from {receipt_anchor.sender}")
+
     yield
 
     # Shutdown
     logger.info("🛑 Stealth Score shutting down...")
+    await openrouter_client.aclose()
+    openrouter_client = None
+    if anchor_task:
+        anchor_task.cancel()
+        # Let an in-flight submission finish (and requeue or record its batch) before the final flush reuses the nonce
+        with suppress(asyncio.CancelledError):
+            await anchor_task
+        receipt_accumulator.seal_current()
+        await receipt_anchor.drain()
+    if webhook_task:
+        # Every queued event was already acknowledged to Stripe with a 200, so apply them before stopping
+        await stripe_gateway.drain()
+        webhook_task.cancel()
+        stripe_gateway.shutdown()
+    did_verifier.executor.shutdown(wait=False)
+    if receipt_store:
+        await asyncio.to_thread(receipt_store.close)
+        receipt_store = None
     if redis_client:
         redis_client.close()
     logger.info("✅ Cleanup completed")
@@ -96,19 +344,94 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+app.add_middleware(RequestContextMiddleware)
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
 MODEL_NAME = "mistralai/mistral-small"
+LOCAL_SCORER_MODEL = "local-scorer"
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+PITCH_TOKEN_BUDGET = int(os.getenv("PITCH_TOKEN_BUDGET", "2000"))
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() == "true"
+NEAR_DUPLICATE_SIMILARITY = float(os.getenv("NEAR_DUPLICATE_SIMILARITY", "0.92"))
+NEAR_DUPLICATE_CAPACITY = int(os.getenv("NEAR_DUPLICATE_CAPACITY", "500000"))
+NEAR_DUPLICATE_MODE = os.getenv("NEAR_DUPLICATE_MODE", "reuse")
+# Short enough that a stalled upstream degrades to the local scorer instead of holding the request
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "8"))
+LOCAL_SCORER_FALLBACK = os.getenv("LOCAL_SCORER_FALLBACK", "true").lower() == "true"
+LOCAL_SCORER_PREFILTER_THRESHOLD = float(os.getenv("LOCAL_SCORER_PREFILTER_THRESHOLD", "2.5"))
+RECEIPT_WINDOW_SECONDS = int(os.getenv("RECEIPT_WINDOW_SECONDS", "60"))
+RECEIPT_WINDOW_RETENTION = int(os.getenv("RECEIPT_WINDOW_RETENTION", "1440"))
+RECEIPT_STORE_ENABLED = os.getenv("RECEIPT_STORE_ENABLED", "true").lower() == "true"
+RECEIPT_STORE_PATH = os.getenv("RECEIPT_STORE_PATH", "receipts.db")
+RECEIPT_BLOOM_CAPACITY = int(os.getenv("RECEIPT_BLOOM_CAPACITY", "1000000"))
+RECEIPT_BLOOM_FPR = float(os.getenv("RECEIPT_BLOOM_FPR", "0.001"))
 WEB3_PROVIDER_URL = os.getenv("WEB3_PROVIDER_URL", "https://mainnet.infura.io/v3/your-key")
+ANCHOR_ENABLED = os.getenv("ANCHOR_ENABLED", "true").lower() == "true"
+ANCHOR_INTERVAL_SECONDS = float(os.getenv("ANCHOR_INTERVAL_SECONDS", "300"))
+ANCHOR_MAX_PENDING = int(os.getenv("ANCHOR_MAX_PENDING", "10000"))
+ANCHOR_MAX_BATCH = int(os.getenv("ANCHOR_MAX_BATCH", "256"))
+ANCHOR_MAX_BACKOFF_SECONDS = float(os.getenv("ANCHOR_MAX_BACKOFF_SECONDS", "3600"))
+ANCHOR_GAS_PRICE_TTL = float(os.getenv("ANCHOR_GAS_PRICE_TTL", "60"))
+ANCHOR_PRIVATE_KEY = os.getenv("ANCHOR_PRIVATE_KEY")
+ANCHOR_ACCOUNT = os.getenv("ANCHOR_ACCOUNT")
+ANCHOR_ADDRESS = os.getenv("ANCHOR_ADDRESS")
+
+ENTITLEMENTS_ENABLED = os.getenv("ENTITLEMENTS_ENABLED", "false").lower() == "true"
+ENTITLEMENT_CACHE_TTL = float(os.getenv("ENTITLEMENT_CACHE_TTL", "30"))
+QUOTA_PERIOD_SECONDS = int(os.getenv("QUOTA_PERIOD_SECONDS", str(30 * 24 * 60 * 60)))
+FREE_TIER_QUOTA = int(os.getenv("FREE_TIER_QUOTA", "3"))
+# Peers whose X-Forwarded-For is believed when metering anonymous callers (e.g. the reverse proxy's address)
+TRUSTED_PROXIES = {proxy.strip() for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()}
+
+DID_VERIFY_WORKERS = int(os.getenv("DID_VERIFY_WORKERS", "4"))
+DID_CHALLENGE_TTL = float(os.getenv("DID_CHALLENGE_TTL", "300"))
+DID_CHALLENGE_CAPACITY = int(os.getenv("DID_CHALLENGE_CAPACITY", "100000"))
+DID_CHALLENGES_PER_DID = int(os.getenv("DID_CHALLENGES_PER_DID", "5"))
+DID_CHALLENGE_RATE = float(os.getenv("DID_CHALLENGE_RATE", "20"))
+DID_CHALLENGE_BURST = int(os.getenv("DID_CHALLENGE_BURST", "1000"))
+
+TEE_CHUNK_SIZE = int(os.getenv("TEE_CHUNK_SIZE", str(64 * 1024)))
+TEE_MAX_UPLOAD_BYTES = int(os.getenv("TEE_MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+
+PRIVACY_NOISE_POOL_SIZE = int(os.getenv("PRIVACY_NOISE_POOL_SIZE", "65536"))
+PRIVACY_NOISE_SEED = int(os.getenv("PRIVACY_NOISE_SEED")) if os.getenv("PRIVACY_NOISE_SEED") else None
+PRIVACY_BUDGET_PER_CLIENT = float(os.getenv("PRIVACY_BUDGET_PER_CLIENT", "1.0"))
+PRIVACY_BUDGET_PERIOD_SECONDS = int(os.getenv("PRIVACY_BUDGET_PERIOD_SECONDS", str(24 * 60 * 60)))
+PRIVACY_BUDGET_MAX_CLIENTS = int(os.getenv("PRIVACY_BUDGET_MAX_CLIENTS", "100000"))
+PRIVACY_BUDGET_ENFORCED = os.getenv("PRIVACY_BUDGET_ENFORCED", "false").lower() == "true"
+
+FEDERATED_HISTORY_ROUNDS = int(os.getenv("FEDERATED_HISTORY_ROUNDS", "32"))
+
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_PATHS = [path.strip() for path in os.getenv("PROFILING_PATHS", "/score,/federated/update").split(",") if path.strip()]
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "1"))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "50"))
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
+STRIPE_MAX_WORKERS = int(os.getenv("STRIPE_MAX_WORKERS", "8"))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv("STRIPE_MAX_NETWORK_RETRIES", "2"))
+STRIPE_INTENT_CACHE_TTL = float(os.getenv("STRIPE_INTENT_CACHE_TTL", "3600"))
+STRIPE_PENDING_INTENT_TTL = float(os.getenv("STRIPE_PENDING_INTENT_TTL", "5"))
+
+# Server-side price list (smallest currency unit); the client only names the tier
+TIER_PRICES: Dict[str, Tuple[int, str]] = {
+    "pro": (2900, "usd"),
+    "enterprise": (19900, "usd")
+}
+STRIPE_WEBHOOK_QUEUE_SIZE = int(os.getenv("STRIPE_WEBHOOK_QUEUE_SIZE", "1000"))
+STRIPE_WEBHOOK_DRAIN_SECONDS = float(os.getenv("STRIPE_WEBHOOK_DRAIN_SECONDS", "10"))
 
 if STRIPE_AVAILABLE:
     stripe.api_key = STRIPE_SECRET_KEY
+    stripe.max_network_retries = STRIPE_MAX_NETWORK_RETRIES
+    if STRIPE_API_BASE:
+        stripe.api_base = STRIPE_API_BASE
 
 try:
     redis_client = redis.from_url(REDIS_URL, decode_responses=True)
@@ -119,7 +442,10 @@ except Exception as e:
     redis_client = None
 
 try:
-    w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URL))
+    if WEB3_PROVIDER_URL == "tester":
+        w3 = Web3(Web3.EthereumTesterProvider())
+    else:
+        w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URL))
     if w3.is_connected():
         logger.info("✅ Web3 connected successfully")
     else:
@@ -163,6 +489,59 @@ class ScoreResponse(BaseModel):
     privacy_proof: Optional[str] = None
     trust_score: Optional[float] = None
     federated_confidence: Optional[float] = None
+    near_duplicate_similarity: Optional[float] = None
+    receipt_leaf: Optional[str] = None
+    receipt_window: Optional[int] = None
+    tier: Optional[str] = None
+    quota_remaining: Optional[int] = None
+
+class MerkleProofStep(BaseModel):
+    hash: str = Field(pattern="^[0-9a-fA-F]{64}$")
+    position: str = Field(pattern="^(left|right)$")
+
+class ReceiptProofResponse(BaseModel):
+    receipt: str
+    leaf: str
+    window_id: int
+    leaf_index: int
+    window_size: int
+    root: str
+    proof: List[MerkleProofStep]
+
+class ReceiptVerificationRequest(BaseModel):
+    receipt: str
+    root: str
+    proof: List[MerkleProofStep]
+
+class ReceiptVerificationResponse(BaseModel):
+    valid: bool
+    root_known: bool
+    window_id: Optional[int] = None
+
+class ReceiptRecordResponse(BaseModel):
+    receipt: str
+    timestamp: int
+    model: str
+    score_digest: str
+
+class BulkReceiptItem(BaseModel):
+    receipt: str
+    score_digest: Optional[str] = None
+
+class BulkReceiptVerificationRequest(BaseModel):
+    receipts: List[BulkReceiptItem] = Field(max_length=10000)
+
+class BulkReceiptVerificationResult(BaseModel):
+    receipt: str
+    found: bool
+    digest_match: Optional[bool] = None
+    timestamp: Optional[int] = None
+    model: Optional[str] = None
+
+class BulkReceiptVerificationResponse(BaseModel):
+    results: List[BulkReceiptVerificationResult]
+    found: int
+    missing: int
 
 class HealthResponse(BaseModel):
     status: str
@@ -204,10 +583,35 @@ class DecentralizedIdentityResponse(BaseModel):
     credentials: List[str]
     reputation_data: Dict[str, Any]
 
+class IdentityChallengeRequest(BaseModel):
+    dids: List[str] = Field(min_length=1, max_length=min(1000, max(1, DID_CHALLENGE_BURST)))
+
+class IdentityChallenge(BaseModel):
+    did: str
+    challenge: str
+    expires_at: int
+
+class IdentityChallengeResponse(BaseModel):
+    challenges: List[IdentityChallenge]
+
+class IdentityBatchRequest(BaseModel):
+    requests: List[DecentralizedIdentityRequest] = Field(max_length=1000)
+
+class IdentityBatchResult(BaseModel):
+    did: str
+    verified: bool
+    identity_score: float
+
+class IdentityBatchResponse(BaseModel):
+    results: List[IdentityBatchResult]
+    verified: int
+    failed: int
+
 class PaymentIntentRequest(BaseModel):
-    amount: int
-    currency: str = "usd"
     tier_id: str
+    # Ignored: the charged amount and currency always come from TIER_PRICES
+    amount: Optional[int] = None
+    currency: Optional[str] = None
     customer_email: Optional[str] = None
 
 class PaymentIntentResponse(BaseModel):
@@ -218,7 +622,6 @@ class PaymentIntentResponse(BaseModel):
 
 class PaymentConfirmationRequest(BaseModel):
     payment_intent_id: str
-    tier_id: str
 
 class PaymentConfirmationResponse(BaseModel):
     success: bool
@@ -226,10 +629,101 @@ class PaymentConfirmationResponse(BaseModel):
     expires_at: Optional[int] = None
     message: str
 
+class NoisePool:
+    """Ring buffer of unit Laplace samples drawn in vectorized blocks from a dedicated generator"""
+
+    def __init__(self, size: int = PRIVACY_NOISE_POOL_SIZE, seed: Optional[int] = PRIVACY_NOISE_SEED):
+        self.size = max(1, size)
+        self.lock = threading.Lock()
+        self.stats = {"samples": 0, "refills": 0}
+        if np is not None:
+            self.rng = np.random.default_rng(seed)
+            self.buffer = np.empty(0)
+        else:
+            self.rng = random.Random(seed)
+            self.buffer = []
+        self.position = 0
+        self._refill()
+
+    def _refill(self) -> None:
+        if np is not None:
+            self.buffer = self.rng.laplace(0.0, 1.0, self.size)
+        else:
+            # Difference of two unit exponentials is unit Laplace
+            self.buffer = [self.rng.expovariate(1.0) - self.rng.expovariate(1.0) for _ in range(self.size)]
+        self.position = 0
+        self.stats["refills"] += 1
+
+    def take(self, count: int):
+        """Return `count` unit Laplace samples (ndarray with numpy, list without); never reuses a sample"""
+        with self.lock:
+            self.stats["samples"] += count
+            if count > self.size:
+                if np is not None:
+                    return self.rng.laplace(0.0, 1.0, count)
+                return [self.rng.expovariate(1.0) - self.rng.expovariate(1.0) for _ in range(count)]
+
+            if self.position + count > self.size:
+                self._refill()
+            start = self.position
+            self.position += count
+            chunk = self.buffer[start:self.position]
+            return chunk.copy() if np is not None else chunk
+
+class PrivacyBudgetLedger:
+    """Per-client epsilon accounting with O(1) charge and lookup; budgets renew every period and the least recently seen clients are evicted"""
+
+    def __init__(self, budget: float = PRIVACY_BUDGET_PER_CLIENT, period_seconds: int = PRIVACY_BUDGET_PERIOD_SECONDS,
+                 max_clients: int = PRIVACY_BUDGET_MAX_CLIENTS):
+        self.budget = budget
+        self.period_seconds = max(1, period_seconds)
+        self.max_clients = max(1, max_clients)
+        self.period = self._period()
+        self.spent: "OrderedDict[str, float]" = OrderedDict()
+        self.total_spent = 0.0
+        self.max_spent = 0.0
+        self.evictions = 0
+
+    def _period(self) -> int:
+        return int(time.time() // self.period_seconds)
+
+    def _rotate(self):
+        period = self._period()
+        if period != self.period:
+            self.period = period
+            self.spent.clear()
+            self.max_spent = 0.0
+
+    def remaining(self, client_id: str) -> float:
+        self._rotate()
+        return round(max(0.0, self.budget - self.spent.get(client_id, 0.0)), 9)
+
+    def allows(self, client_id: str, epsilon: float) -> bool:
+        """Whether spending epsilon more this period stays within the client's budget"""
+        self._rotate()
+        return self.spent.get(client_id, 0.0) + epsilon <= self.budget + 1e-12
+
+    def charge(self, client_id: str, epsilon: float):
+        """Record epsilon actually spent (after the update was aggregated)"""
+        self._rotate()
+        spent = self.spent.pop(client_id, 0.0) + epsilon
+        self.spent[client_id] = spent
+        self.total_spent += epsilon
+        self.max_spent = max(self.max_spent, spent)
+        while len(self.spent) > self.max_clients:
+            self.spent.popitem(last=False)
+            self.evictions += 1
+
+    def lowest_remaining(self) -> float:
+        """Remaining budget of the most-spent client this period (the full budget if nobody has spent yet)"""
+        self._rotate()
+        return round(max(0.0, self.budget - self.max_spent), 9)
+
 class PrivacyEngine:
     def __init__(self):
         self.differential_privacy_epsilon = 0.1
         self.noise_scale = 1.0 / self.differential_privacy_epsilon
+        self.noise_pool = NoisePool()
         self.tee_attestation_key = self._generate_tee_key()
 
     def _generate_tee_key(self) -> str:
@@ -238,12 +732,35 @@ class PrivacyEngine:
 
     def add_differential_privacy_noise(self, value: float) -> float:
         """Add Laplace noise for differential privacy"""
-        if np is not None:
-            noise = np.random.laplace(0, self.noise_scale)
+        noise = self.noise_pool.take(1)[0] * self.noise_scale
+        return max(0.0, min(10.0, value + float(noise)))
+
+    def noise_scores(self, scores: Dict[str, float]) -> Dict[str, float]:
+        """Add Laplace noise to every score in one vectorized draw"""
+        return self.noise_score_batch([scores])[0]
+
+    def noise_score_batch(self, batch: List[Dict[str, float]]) -> List[Dict[str, float]]:
+        """Add Laplace noise to a whole batch of score dicts with a single draw from the pool"""
+        keys = [list(scores) for scores in batch]
+        total = sum(len(k) for k in keys)
+        if total == 0:
+            return [{} for _ in batch]
+
+        noise = self.noise_pool.take(total)
+        if np is not None and total >= 256:
+            values = np.fromiter((scores[k] for scores, ks in zip(batch, keys) for k in ks), dtype=float, count=total)
+            noised = np.clip(values + noise * self.noise_scale, 0.0, 10.0).tolist()
         else:
+            # Small batches: numpy's per-call overhead outweighs the arithmetic
+            noise = noise.tolist() if np is not None else noise
+            values = [scores[k] for scores, ks in zip(batch, keys) for k in ks]
+            noised = [max(0.0, min(10.0, v + n * self.noise_scale)) for v, n in zip(values, noise)]
 
-            noise = random.gauss(0, self.noise_scale)
-        return max(0.0, min(10.0, value + noise))
+        results, offset = [], 0
+        for ks in keys:
+            results.append(dict(zip(ks, noised[offset:offset + len(ks)])))
+            offset += len(ks)
+        return results
 
     def homomorphic_encrypt_score(self, score: float, public_key: str) -> str:
         """Simulate homomorphic encryption (placeholder for real implementation)"""
@@ -262,23 +779,68 @@ class PrivacyEngine:
         }
         return base64.b64encode(json.dumps(proof_data).encode()).decode()
 
+    def start_tee_execution(self) -> "TEEExecution":
+        """Open an incremental TEE execution; feed it chunks with update() and close it with finalize()"""
+        return TEEExecution()
+
     def simulate_tee_execution(self, data: str) -> Dict[str, Any]:
         """Simulate Trusted Execution Environment processing"""
 
-        start_time = time.time()
+        execution = self.start_tee_execution()
+        payload = memoryview(data.encode())
+        for offset in range(0, len(payload), TEE_CHUNK_SIZE):
+            execution.update(payload[offset:offset + TEE_CHUNK_SIZE])
+        return execution.finalize()
+
+class TEEExecution:
+    """Single-pass TEE measurement: each chunk feeds the measurement and signature digests once, so memory stays bounded by the chunk size"""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.started = time.perf_counter()
+        self.measurement = hashlib.sha256()
+        # Same digest as sha256(f"SIG_{data}_{start_time}"), built without materialising the concatenation
+        self.signature = hashlib.sha256(b"SIG_")
+        self.bytes_processed = 0
+        self.chunks = 0
+        self.hash_seconds = 0.0
+        self.last_chunk_at = self.started
+
+    def update(self, chunk) -> None:
+        started = time.perf_counter()
+        self.measurement.update(chunk)
+        self.signature.update(chunk)
+        self.last_chunk_at = time.perf_counter()
+        self.hash_seconds += self.last_chunk_at - started
+        self.bytes_processed += len(chunk)
+        self.chunks += 1
+
+    def finalize(self) -> Dict[str, Any]:
+        attest_started = time.perf_counter()
+        self.signature.update(f"_{self.start_time}".encode())
 
         attestation = {
-            "enclave_id": hashlib.sha256(f"ENCLAVE_{start_time}".encode()).hexdigest()[:16],
-            "measurement": hashlib.sha256(data.encode()).hexdigest()[:32],
-            "timestamp": int(start_time),
-            "signature": hashlib.sha256(f"SIG_{data}_{start_time}".encode()).hexdigest()
+            "enclave_id": hashlib.sha256(f"ENCLAVE_{self.start_time}".encode()).hexdigest()[:16],
+            "measurement": self.measurement.hexdigest()[:32],
+            "timestamp": int(self.start_time),
+            "signature": self.signature.hexdigest()
         }
 
+        finished = time.perf_counter()
+        total = finished - self.started
         computation_result = {
             "processed": True,
             "integrity_verified": True,
             "confidentiality_preserved": True,
-            "execution_time_ms": round((time.time() - start_time) * 1000, 2)
+            "bytes_processed": self.bytes_processed,
+            "chunks": self.chunks,
+            "execution_time_ms": round(total * 1000, 3),
+            "phases_ms": {
+                # Time spent waiting on the client between chunks (zero for in-memory payloads beyond slicing)
+                "ingest": round(max(0.0, self.last_chunk_at - self.started - self.hash_seconds) * 1000, 3),
+                "hash": round(self.hash_seconds * 1000, 3),
+                "attest": round((finished - attest_started) * 1000, 3)
+            }
         }
 
         return {
@@ -292,7 +854,39 @@ class FederatedLearningEngine:
         self.global_model = self._initialize_model()
         self.round_number = 0
         self.participants = []
-        self.privacy_budget = 1.0
+        self.privacy_ledger = PrivacyBudgetLedger()
+        # Per-process id keeps ETags from a previous run (where round numbers restart) from matching
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.history: "deque[Tuple[int, Dict[str, List[float]]]]" = deque([(0, self.global_model)], maxlen=max(1, FEDERATED_HISTORY_ROUNDS))
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.instance_id}-{self.round_number}"'
+
+    def parse_version(self, token: str) -> Optional[int]:
+        """Round number from an ETag-style version token, or None if it is malformed or from another process"""
+        instance, _, round_number = token.strip().removeprefix("W/").strip('"').rpartition("-")
+        if instance != self.instance_id or not round_number.isdigit():
+            return None
+        return int(round_number)
+
+    def delta_since(self, round_number: int) -> Optional[Dict[str, Any]]:
+        """Changed weights between a past round and the current one, or None if that round is no longer held"""
+        previous = next((model for number, model in self.history if number == round_number), None)
+        if previous is None:
+            return None
+
+        changes: Dict[str, Dict[str, List[Any]]] = {}
+        for key, weights in self.global_model.items():
+            old_weights = previous.get(key)
+            if old_weights is None or len(old_weights) != len(weights):
+                changes[key] = {"indices": list(range(len(weights))), "values": weights, "length": len(weights)}
+                continue
+            indices = [i for i, (old, new) in enumerate(zip(old_weights, weights)) if old != new]
+            if indices:
+                changes[key] = {"indices": indices, "values": [weights[i] for i in indices]}
+
+        return {"changes": changes, "removed": [key for key in previous if key not in self.global_model]}
 
     def _initialize_model(self) -> Dict[str, List[float]]:
         """Initialize global model weights"""
@@ -318,15 +912,15 @@ class FederatedLearningEngine:
                 if key in update.model_weights:
                     weight = update.local_samples / total_samples
 
-                    noisy_weights = [
-                        w + np.random.laplace(0, 0.01) for w in update.model_weights[key]
-                    ]
-                    weighted_sum += np.array(noisy_weights) * weight
+                    weights = np.asarray(update.model_weights[key], dtype=float)
+                    noisy_weights = weights + privacy_engine.noise_pool.take(len(weights)) * 0.01
+                    weighted_sum += noisy_weights * weight
 
             aggregated_weights[key] = weighted_sum.tolist()
 
         self.global_model = aggregated_weights
         self.round_number += 1
+        self.history.append((self.round_number, aggregated_weights))
         self.participants = [update.client_id for update in updates]
 
         return self.global_model
@@ -367,9 +961,1543 @@ class TrustGraphEngine:
         trust_score = min(10.0, base_score + connection_bonus + recency_bonus)
         return round(trust_score, 2)
 
+class PitchCompactor:
+    """Linear-time pitch preprocessing that fits decrypted text to an LLM token budget"""
+
+    CHARS_PER_TOKEN = 4.0
+    TRUNCATION_MARKER = " [...]"
+    MIN_DEDUP_LENGTH = 12
+    SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+")
+
+    BOILERPLATE = re.compile(
+        r"^(?:"
+        r"(?:strictly\s+)?(?:private\s+(?:&|and)\s+)?confidential"
+        r"(?:\s*[-–—:|]\s*(?:do\s+not\s+(?:distribute|share|forward|copy)|not\s+for\s+distribution|internal\s+use\s+only))?\.?"
+        r"|.*all rights reserved\.?"
+        r"|(?:©|\(c\)|copyright\s+(?:©|\(c\))?)\s*\d{4}(?:\s*[-–]\s*\d{4})?\b.*"
+        r"|page\s+\d+(?:\s+of\s+\d+)?"
+        r"|slide\s+\d+(?:\s*/\s*\d+)?"
+        r"|\d+\s*/\s*\d+"
+        r"|(?:https?://|www\.)\S+"
+        r"|thank\s+you!?|thanks!?|questions\??|q\s*&\s*a"
+        r")$",
+        re.IGNORECASE
+    )
+    # Footers are short; anything longer is treated as content even if it opens like one
+    BOILERPLATE_MAX_LENGTH = 80
+    HEADING_KEYWORDS = {
+        "problem", "solution", "product", "market", "market size", "traction", "team", "business model",
+        "competition", "competitors", "go-to-market", "go to market", "tokenomics", "token", "governance",
+        "roadmap", "financials", "the ask", "ask", "funding", "use of funds", "vision", "overview", "summary"
+    }
+    ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"))
+
+    def __init__(self, token_budget: int = PITCH_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.stats = {
+            "pitches_processed": 0,
+            "pitches_truncated": 0,
+            "tokens_in": 0,
+            "tokens_out": 0,
+            "tokens_saved": 0,
+            "duplicate_sentences_removed": 0,
+            "boilerplate_lines_removed": 0
+        }
+
+    def estimate_tokens(self, text: str) -> int:
+        """Cheap token estimate (~4 characters per token for English prose)"""
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+    def normalize(self, text: str) -> List[str]:
+        """Normalize unicode and whitespace, returning non-empty lines"""
+        text = unicodedata.normalize("NFKC", text).translate(self.ZERO_WIDTH)
+        lines = []
+        for raw_line in text.splitlines():
+            line = " ".join(raw_line.split())
+            if line:
+                lines.append(line)
+        return lines
+
+    def _is_heading(self, line: str) -> bool:
+        if line.startswith("#"):
+            return True
+        if len(line) > 60:
+            return False
+        stripped = line.rstrip(":").strip().lower()
+        return stripped in self.HEADING_KEYWORDS or (line.endswith(":") and len(line.split()) <= 6)
+
+    def _sections(self, lines: List[str]) -> List[Tuple[str, List[str]]]:
+        """Group lines under headings, merging repeated headings and dropping boilerplate and duplicates"""
+        sections: Dict[str, Tuple[str, List[str]]] = {}
+        current = ""
+        sections[current] = ("", [])
+        seen_sentences = set()
+
+        for line in lines:
+            if len(line) <= self.BOILERPLATE_MAX_LENGTH and self.BOILERPLATE.match(line):
+                self.stats["boilerplate_lines_removed"] += 1
+                continue
+
+            if self._is_heading(line):
+                key = line.lstrip("#").rstrip(":").strip().lower()
+                if key not in sections:
+                    sections[key] = (line, [])
+                current = key
+                continue
+
+            kept = []
+            for sentence in self.SENTENCE_BOUNDARY.split(line):
+                fingerprint = re.sub(r"\W+", "", sentence.lower())
+                if len(fingerprint) >= self.MIN_DEDUP_LENGTH:
+                    if fingerprint in seen_sentences:
+                        self.stats["duplicate_sentences_removed"] += 1
+                        continue
+                    seen_sentences.add(fingerprint)
+                kept.append(sentence)
+            if kept:
+                sections[current][1].append(" ".join(kept))
+
+        return [section for section in sections.values() if section[1]]
+
+    def _truncate_section(self, body: str, char_budget: int) -> str:
+        """Keep leading sentences of a section until its character budget is spent"""
+        if len(body) <= char_budget:
+            return body
+
+        kept = []
+        used = 0
+        for sentence in self.SENTENCE_BOUNDARY.split(body):
+            if used + len(sentence) + 1 > char_budget:
+                break
+            kept.append(sentence)
+            used += len(sentence) + 1
+
+        if not kept:
+            cut = body[:max(char_budget - len(self.TRUNCATION_MARKER), 0)]
+            kept = [cut.rsplit(" ", 1)[0] if " " in cut else cut]
+
+        return " ".join(kept) + self.TRUNCATION_MARKER
+
+    def _allocate(self, sizes: List[int], total_budget: int) -> List[int]:
+        """Max-min fair split of the budget: small sections stay whole, large ones share the remainder"""
+        allocation = [0] * len(sizes)
+        remaining_budget = total_budget
+        remaining = sorted(range(len(sizes)), key=lambda i: sizes[i])
+
+        while remaining:
+            share = remaining_budget // len(remaining)
+            index = remaining[0]
+            if sizes[index] <= share:
+                allocation[index] = sizes[index]
+                remaining_budget -= sizes[index]
+                remaining.pop(0)
+            else:
+                for index in remaining:
+                    allocation[index] = share
+                break
+
+        return allocation
+
+    def compact(self, text: str) -> str:
+        """Normalize, strip boilerplate, deduplicate and fit the pitch to the token budget"""
+        self.stats["pitches_processed"] += 1
+        tokens_in = self.estimate_tokens(text)
+
+        sections = self._sections(self.normalize(text))
+        bodies = [(heading, " ".join(lines)) for heading, lines in sections]
+        rendered = [f"{heading}\n{body}" if heading else body for heading, body in bodies]
+        compacted = "\n\n".join(rendered)
+
+        char_budget = int(self.token_budget * self.CHARS_PER_TOKEN)
+        if len(compacted) > char_budget:
+            self.stats["pitches_truncated"] += 1
+            overhead = sum(len(heading) + 1 for heading, _ in bodies) + 2 * max(len(bodies) - 1, 0)
+            allocation = self._allocate([len(body) for _, body in bodies], max(char_budget - overhead, 0))
+            rendered = []
+            for (heading, body), budget in zip(bodies, allocation):
+                if budget <= len(self.TRUNCATION_MARKER):
+                    continue
+                body = self._truncate_section(body, budget)
+                rendered.append(f"{heading}\n{body}" if heading else body)
+            compacted = "\n\n".join(rendered)
+
+        tokens_out = self.estimate_tokens(compacted)
+        self.stats["tokens_in"] += tokens_in
+        self.stats["tokens_out"] += tokens_out
+        self.stats["tokens_saved"] += max(tokens_in - tokens_out, 0)
+
+        return compacted
+
+class NearDuplicateIndex:
+    """SimHash index with LSH banding over recently scored pitches, used to reuse prior scores"""
+
+    HASH_BITS = 64
+    SHINGLE_SIZE = 3
+    REDIS_KEY = "near_duplicate_index"
+
+    def __init__(self, similarity: float = NEAR_DUPLICATE_SIMILARITY, capacity: int = NEAR_DUPLICATE_CAPACITY,
+                 mode: str = NEAR_DUPLICATE_MODE):
+        self.similarity = similarity
+        self.capacity = capacity
+        self.mode = mode
+        self.max_distance = int((1.0 - similarity) * self.HASH_BITS)
+
+        # Pigeonhole: with max_distance + 1 disjoint bands, any fingerprint within
+        # max_distance bits of a stored one matches it exactly on at least one band.
+        band_count = min(self.max_distance + 1, self.HASH_BITS)
+        width, extra = divmod(self.HASH_BITS, band_count)
+        self.bands = []
+        offset = 0
+        for band in range(band_count):
+            band_width = width + (1 if band < extra else 0)
+            self.bands.append((offset, (1 << band_width) - 1))
+            offset += band_width
+
+        self.buckets: List[Dict[int, set]] = [{} for _ in self.bands]
+        self.entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"lookups": 0, "hits": 0, "candidates_checked": 0, "evictions": 0}
+
+    def fingerprint(self, text: str) -> int:
+        """64-bit SimHash over word shingles of the normalized pitch"""
+        words = re.findall(r"\w+", text.lower())
+        if len(words) >= self.SHINGLE_SIZE:
+            shingles = {" ".join(words[i:i + self.SHINGLE_SIZE]) for i in range(len(words) - self.SHINGLE_SIZE + 1)}
+        else:
+            shingles = set(words)
+        if not shingles:
+            return 0
+
+        hashes = [hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles]
+
+        if np is not None:
+            bits = np.unpackbits(np.frombuffer(b"".join(hashes), dtype=np.uint8).reshape(len(hashes), 8), axis=1)
+            votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(hashes)
+            fingerprint = 0
+            for bit in np.flatnonzero(votes > 0):
+                fingerprint |= 1 << (self.HASH_BITS - 1 - int(bit))
+            return fingerprint
+
+        votes = [0] * self.HASH_BITS
+        for digest in hashes:
+            value = int.from_bytes(digest, "big")
+            for bit in range(self.HASH_BITS):
+                votes[bit] += 1 if value >> (self.HASH_BITS - 1 - bit) & 1 else -1
+        return sum(1 << (self.HASH_BITS - 1 - bit) for bit, vote in enumerate(votes) if vote > 0)
+
+    def _band_keys(self, fingerprint: int):
+        for band, (offset, mask) in enumerate(self.bands):
+            yield band, (fingerprint >> offset) & mask
+
+    def add(self, fingerprint: int, scores: Dict[str, float], timestamp: Optional[float] = None):
+        if fingerprint in self.entries:
+            self.entries.move_to_end(fingerprint)
+            self.entries[fingerprint] = {"scores": scores, "timestamp": timestamp or time.time()}
+            return
+
+        self.entries[fingerprint] = {"scores": scores, "timestamp": timestamp or time.time()}
+        for band, key in self._band_keys(fingerprint):
+            self.buckets[band].setdefault(key, set()).add(fingerprint)
+
+        while len(self.entries) > self.capacity:
+            evicted, _ = self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+            for band, key in self._band_keys(evicted):
+                bucket = self.buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(evicted)
+                    if not bucket:
+                        del self.buckets[band][key]
+
+    def lookup(self, fingerprint: int) -> Optional[Tuple[Dict[str, float], float]]:
+        """Return (scores, similarity) for the nearest indexed pitch(es), or None below the threshold"""
+        self.stats["lookups"] += 1
+
+        candidates = set()
+        for band, key in self._band_keys(fingerprint):
+            bucket = self.buckets[band].get(key)
+            if bucket:
+                candidates.update(bucket)
+        self.stats["candidates_checked"] += len(candidates)
+
+        matches = []
+        for candidate in candidates:
+            distance = (candidate ^ fingerprint).bit_count()
+            if distance <= self.max_distance:
+                matches.append((1.0 - distance / self.HASH_BITS, candidate))
+        if not matches:
+            return None
+
+        self.stats["hits"] += 1
+        best_similarity, best = max(matches)
+        self.entries.move_to_end(best)
+
+        if self.mode == "blend" and len(matches) > 1:
+            total_weight = sum(similarity for similarity, _ in matches)
+            blended: Dict[str, float] = {}
+            for similarity, candidate in matches:
+                for key, value in self.entries[candidate]["scores"].items():
+                    blended[key] = blended.get(key, 0.0) + value * similarity / total_weight
+            return {key: round(value, 2) for key, value in blended.items()}, round(best_similarity, 4)
+
+        return dict(self.entries[best]["scores"]), round(best_similarity, 4)
+
+    def persist(self, fingerprint: int, scores: Dict[str, float]):
+        """Append an entry to Redis so the index survives restarts"""
+        if redis_client:
+            entry = {"fingerprint": format(fingerprint, "016x"), "scores": scores, "timestamp": time.time()}
+            redis_client.lpush(self.REDIS_KEY, json.dumps(entry))
+            redis_client.ltrim(self.REDIS_KEY, 0, self.capacity - 1)
+
+    def load_from_redis(self) -> int:
+        if not redis_client:
+            return 0
+        loaded = 0
+        for raw in reversed(redis_client.lrange(self.REDIS_KEY, 0, self.capacity - 1)):
+            try:
+                entry = json.loads(raw)
+                self.add(int(entry["fingerprint"], 16), entry["scores"], entry.get("timestamp"))
+                loaded += 1
+            except (ValueError, KeyError, TypeError):
+                continue
+        return loaded
+
+class LocalScorer:
+    """Sub-millisecond heuristic scorer: hashed n-gram and structure features weighted by the federated model"""
+
+    HASH_DIM = 1 << 14
+    NUMERIC = re.compile(r"[$€£]?\d[\d,.]*[%kKmMbB]?")
+    CRITERIA = ["clarity", "originality", "team_strength", "market_fit"]
+    LEXICONS = {
+        "clarity": [
+            "problem", "solution", "product", "how it works", "overview", "summary", "roadmap", "vision",
+            "we build", "we are building", "our mission", "use case", "customers", "the ask"
+        ],
+        "originality": [
+            "novel", "first", "patent", "proprietary", "unique", "breakthrough", "new approach", "zero knowledge",
+            "zk", "protocol", "algorithm", "research", "open source", "unlike"
+        ],
+        "team_strength": [
+            "team", "founder", "co-founder", "ceo", "cto", "engineer", "phd", "years", "previously", "ex",
+            "exited", "built", "led", "advisor", "experience"
+        ],
+        "market_fit": [
+            "market", "tam", "customers", "users", "revenue", "traction", "growth", "mom", "pilot", "pilots",
+            "paying", "demand", "retention", "partners", "arr", "mrr"
+        ]
+    }
+
+    def __init__(self):
+        self.lexicon_buckets = {
+            criterion: self._bucket_indices(terms) for criterion, terms in self.LEXICONS.items()
+        }
+        self.stats = {"scored": 0, "fallbacks": 0, "prefiltered": 0}
+
+    def _hash(self, ngram: str) -> int:
+        return zlib.crc32(ngram.encode("utf-8")) & (self.HASH_DIM - 1)
+
+    def _bucket_indices(self, terms: List[str]) -> List[int]:
+        return sorted({self._hash(term) for term in terms})
+
+    def features(self, text: str) -> Dict[str, List[float]]:
+        """Four features per criterion, each in [0, 1], matching the federated weight vectors"""
+        words = re.findall(r"[a-z0-9$%][a-z0-9$%'-]*", text.lower())
+        word_count = len(words)
+        ngrams = set(words)
+        ngrams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        crc32, mask = zlib.crc32, self.HASH_DIM - 1
+        buckets = [crc32(ngram.encode("utf-8")) & mask for ngram in ngrams]
+
+        if np is not None and buckets:
+            present = np.bincount(np.asarray(buckets, dtype=np.int64), minlength=self.HASH_DIM) > 0
+            coverage = {c: float(present[idx].mean()) for c, idx in self.lexicon_buckets.items()}
+        else:
+            present_set = set(buckets)
+            coverage = {
+                c: sum(1 for i in idx if i in present_set) / len(idx) for c, idx in self.lexicon_buckets.items()
+            }
+
+        sentences = max(len(re.findall(r"[.!?](?:\s|$)", text)), 1)
+        lines = [line for line in text.splitlines() if line.strip()]
+        headings = sum(1 for line in lines if pitch_compactor._is_heading(line.strip()))
+        numbers = len(self.NUMERIC.findall(text))
+
+        avg_sentence = word_count / sentences
+        length_fit = min(word_count / 150, 1.0) * (1.0 if word_count <= 2000 else 2000 / word_count)
+        sentence_fit = max(0.0, 1.0 - abs(avg_sentence - 20) / 20)
+        structure = min(headings / 4, 1.0) if headings else min(len(lines) / 8, 0.5)
+        diversity = len(set(words)) / word_count if word_count else 0.0
+        specificity = min(numbers / max(word_count, 1) * 10, 1.0)
+        role_mentions = min(sum(1 for word in words if word in ("ceo", "cto", "coo", "cfo", "founder", "co-founder")) / 3, 1.0)
+        experience = min(len(re.findall(r"\b(?:ex-|former|previously|\d+\s+years)", text.lower())) / 3, 1.0)
+
+        def scaled(value: float) -> float:
+            return min(value * 3.0, 1.0)
+
+        return {
+            "clarity": [structure, sentence_fit, length_fit, scaled(coverage["clarity"])],
+            "originality": [diversity, scaled(coverage["originality"]), specificity, length_fit],
+            "team_strength": [scaled(coverage["team_strength"]), role_mentions, experience, length_fit],
+            "market_fit": [scaled(coverage["market_fit"]), specificity, length_fit, sentence_fit]
+        }
+
+    def score(self, text: str, model: Optional[Dict[str, List[float]]] = None) -> Dict[str, float]:
+        """Score all criteria from the feature matrix and federated weight vectors"""
+        self.stats["scored"] += 1
+        return self._weighted(self.features(text), model if model is not None else federated_engine.global_model)
+
+    def score_with_prefilter(self, text: str, model: Optional[Dict[str, List[float]]] = None) -> Tuple[Dict[str, float], bool]:
+        """(scores, incomplete?); the pre-filter uses fixed uniform weights so federated updates cannot trip it"""
+        self.stats["scored"] += 1
+        features = self.features(text)
+        scores = self._weighted(features, model if model is not None else federated_engine.global_model)
+        return scores, self.is_incomplete(self._weighted(features, {}))
+
+    def _weighted(self, features: Dict[str, List[float]], model: Dict[str, List[float]]) -> Dict[str, float]:
+        scores = {}
+        for criterion in self.CRITERIA:
+            values = features[criterion]
+            weights = list(model.get(f"{criterion}_weights") or [])[:len(values)]
+            weights = [max(float(w), 0.0) for w in weights] + [0.0] * (len(values) - len(weights))
+            norm = sum(weights)
+            if norm <= 0:
+                # Missing, all-zero or all-negative weights (e.g. a round where no client sent this criterion)
+                weights, norm = [1.0] * len(values), float(len(values))
+            raw = sum(w * f for w, f in zip(weights, values)) / norm
+            scores[criterion] = round(max(0.0, min(10.0, 10.0 * raw)), 1)
+        return scores
+
+    def is_incomplete(self, scores: Dict[str, float]) -> bool:
+        """Pre-filter: obviously incomplete pitches are not worth an LLM call"""
+        return sum(scores.values()) / len(scores) < LOCAL_SCORER_PREFILTER_THRESHOLD
+
+class ReceiptAccumulator:
+    """Collects receipts into one Merkle tree per time window and serves O(log n) inclusion proofs"""
+
+    def __init__(self, window_seconds: int = RECEIPT_WINDOW_SECONDS, retention: int = RECEIPT_WINDOW_RETENTION):
+        self.window_seconds = window_seconds
+        self.retention = retention
+        self.current_window = self._window_id(time.time())
+        self.pending: List[bytes] = []
+        self.windows: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.receipt_index: Dict[str, Tuple[int, int]] = {}
+        self.root_index: Dict[str, int] = {}
+        self.seal_listeners: List[Callable[[int, str], None]] = []
+
+    def _window_id(self, timestamp: float) -> int:
+        return int(timestamp // self.window_seconds)
+
+    @staticmethod
+    def leaf_hash(receipt: str) -> bytes:
+        # 0x00 / 0x01 prefixes separate leaves from interior nodes (RFC 6962)
+        return hashlib.sha256(b"\x00" + receipt.encode("utf-8")).digest()
+
+    @staticmethod
+    def node_hash(left: bytes, right: bytes) -> bytes:
+        return hashlib.sha256(b"\x01" + left + right).digest()
+
+    def _build_levels(self, leaves: List[bytes]) -> List[List[bytes]]:
+        """All tree levels bottom-up; an odd trailing node is promoted rather than duplicated"""
+        levels = [leaves]
+        while len(levels[-1]) > 1:
+            level = levels[-1]
+            parents = [self.node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            levels.append(parents)
+        return levels
+
+    def roll(self, now: Optional[float] = None):
+        """Seal the current window if its time span has passed"""
+        window = self._window_id(now if now is not None else time.time())
+        if window == self.current_window:
+            return
+        if self.pending:
+            self._seal(self.current_window)
+        self.current_window = window
+
+    def seal_current(self):
+        """Seal the open window now regardless of its time span (shutdown only: later receipts in the same window would reseal it)"""
+        if self.pending:
+            self._seal(self.current_window)
+
+    def _seal(self, window_id: int):
+        levels = self._build_levels(self.pending)
+        root = levels[-1][0].hex()
+        self.windows[window_id] = {"levels": levels, "root": root, "sealed_at": time.time()}
+        self.root_index[root] = window_id
+        self.pending = []
+
+        for listener in self.seal_listeners:
+            listener(window_id, root)
+
+        while len(self.windows) > self.retention:
+            expired_id, expired = self.windows.popitem(last=False)
+            self.root_index.pop(expired["root"], None)
+            for leaf in expired["levels"][0]:
+                # A receipt seen again in a later window keeps its newer location
+                if self.receipt_index.get(leaf.hex(), (None,))[0] == expired_id:
+                    del self.receipt_index[leaf.hex()]
+
+    def add(self, receipt: str) -> Tuple[str, int]:
+        """Queue a receipt for the current window; returns (leaf hash, window id)"""
+        self.roll()
+        leaf = self.leaf_hash(receipt)
+        self.receipt_index[leaf.hex()] = (self.current_window, len(self.pending))
+        self.pending.append(leaf)
+        return leaf.hex(), self.current_window
+
+    def proof(self, receipt: str) -> Optional[Dict[str, Any]]:
+        """Inclusion proof for a receipt; None if unknown, {"pending": True} if its window is still open"""
+        self.roll()
+        leaf = self.leaf_hash(receipt).hex()
+        location = self.receipt_index.get(leaf)
+        if location is None:
+            return None
+
+        window_id, index = location
+        window = self.windows.get(window_id)
+        if window is None:
+            return {"pending": True, "window_id": window_id, "leaf": leaf}
+
+        steps = []
+        position = index
+        for level in window["levels"][:-1]:
+            sibling = position ^ 1
+            if sibling < len(level):
+                steps.append({"hash": level[sibling].hex(), "position": "left" if sibling < position else "right"})
+            position //= 2
+
+        return {
+            "receipt": receipt,
+            "leaf": leaf,
+            "window_id": window_id,
+            "leaf_index": index,
+            "window_size": len(window["levels"][0]),
+            "root": window["root"],
+            "proof": steps
+        }
+
+    def verify(self, receipt: str, proof: List[Dict[str, str]], root: str) -> bool:
+        node = self.leaf_hash(receipt)
+        for step in proof:
+            try:
+                sibling = bytes.fromhex(step["hash"])
+            except ValueError:
+                return False
+            node = self.node_hash(sibling, node) if step["position"] == "left" else self.node_hash(node, sibling)
+        return node.hex() == root.lower()
+
+class ReceiptAnchor:
+    """Anchors sealed receipt window roots on-chain, many windows per transaction, off the request path"""
+
+    MAGIC = b"SSRA"
+
+    def __init__(self, web3_client, interval: float = ANCHOR_INTERVAL_SECONDS, max_pending: int = ANCHOR_MAX_PENDING,
+                 max_batch: int = ANCHOR_MAX_BATCH, private_key: Optional[str] = ANCHOR_PRIVATE_KEY,
+                 sender_account: Optional[str] = ANCHOR_ACCOUNT, to_address: Optional[str] = ANCHOR_ADDRESS):
+        self.w3 = web3_client
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        # Anchoring spends gas, so the signer must be chosen explicitly; never fall back to whatever the node has unlocked
+        if not private_key and not sender_account:
+            raise ValueError("set ANCHOR_PRIVATE_KEY or ANCHOR_ACCOUNT")
+        self.account = web3_client.eth.account.from_key(private_key) if private_key else None
+        self.sender = self.account.address if self.account else web3_client.to_checksum_address(sender_account)
+        self.to_address = to_address
+        self.pending: deque = deque()
+        self.nonce: Optional[int] = None
+        self.gas_price: Optional[Tuple[int, float]] = None
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self.history: deque = deque(maxlen=100)
+        # Serialises submissions so two flushes can never share a nonce
+        self.flush_lock = asyncio.Lock()
+        self.stats = {"enqueued": 0, "dropped": 0, "anchored_batches": 0, "anchored_roots": 0, "failed_attempts": 0}
+
+    def enqueue(self, window_id: int, root: str):
+        """Seal listener; drops the oldest root when the queue is full so scoring never blocks"""
+        if len(self.pending) >= self.max_pending:
+            self.pending.popleft()
+            self.stats["dropped"] += 1
+        self.pending.append((window_id, root))
+        self.stats["enqueued"] += 1
+
+    def _current_gas_price(self) -> int:
+        now = time.monotonic()
+        if self.gas_price is None or now - self.gas_price[1] > ANCHOR_GAS_PRICE_TTL:
+            self.gas_price = (self.w3.eth.gas_price, now)
+        return self.gas_price[0]
+
+    def _submit(self, batch: List[Tuple[int, str]]) -> Tuple[str, str]:
+        """Blocking: build, sign and send one transaction carrying every root in the batch"""
+        roots = [bytes.fromhex(root) for _, root in batch]
+        aggregate = receipt_accumulator._build_levels(roots)[-1][0]
+        sender = self.sender
+
+        if self.nonce is None:
+            self.nonce = self.w3.eth.get_transaction_count(sender, "pending")
+
+        tx = {
+            "from": sender,
+            "to": self.to_address or sender,
+            "value": 0,
+            "data": self.MAGIC + aggregate + b"".join(roots),
+            "nonce": self.nonce,
+            "gasPrice": self._current_gas_price(),
+            "chainId": self.w3.eth.chain_id
+        }
+        tx["gas"] = int(self.w3.eth.estimate_gas(tx) * 1.2)
+
+        if self.account:
+            signed = self.account.sign_transaction(tx)
+            raw = getattr(signed, "raw_transaction", None) or getattr(signed, "rawTransaction")
+            tx_hash = self.w3.eth.send_raw_transaction(raw)
+        else:
+            tx_hash = self.w3.eth.send_transaction(tx)
+
+        self.nonce += 1
+        return self.w3.to_hex(tx_hash), aggregate.hex()
+
+    def _requeue(self, batch: List[Tuple[int, str]], error: BaseException):
+        self.failures += 1
+        self.stats["failed_attempts"] += 1
+        self.nonce = None
+        self.gas_price = None
+        self.pending.extendleft(reversed(batch))
+        while len(self.pending) > self.max_pending:
+            self.pending.popleft()
+            self.stats["dropped"] += 1
+        backoff = min(self.interval * (2 ** self.failures), ANCHOR_MAX_BACKOFF_SECONDS)
+        self.next_attempt_at = time.monotonic() + backoff
+        logger.error(f"Receipt anchoring failed ({type(error).__name__}), retrying in {backoff:.0f}s")
+
+    def _record(self, batch: List[Tuple[int, str]], tx_hash: str, aggregate: str):
+        self.failures = 0
+        self.stats["anchored_batches"] += 1
+        self.stats["anchored_roots"] += len(batch)
+        self.history.append({
+            "tx_hash": tx_hash,
+            "aggregate_root": aggregate,
+            "windows": [window_id for window_id, _ in batch],
+            "anchored_at": time.time()
+        })
+        for window_id, _ in batch:
+            window = receipt_accumulator.windows.get(window_id)
+            if window is not None:
+                window["anchor_tx"] = tx_hash
+
+        logger.info(f"⛓️  Anchored {len(batch)} receipt roots in {tx_hash}")
+
+    async def flush(self, force: bool = False) -> Optional[str]:
+        """Anchor up to max_batch pending roots; failures back off exponentially (unless forced) and requeue the batch"""
+        receipt_accumulator.roll()
+        async with self.flush_lock:
+            if not self.pending or (not force and time.monotonic() < self.next_attempt_at):
+                return None
+
+            batch = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+            submission = asyncio.ensure_future(asyncio.to_thread(self._submit, batch))
+            try:
+                tx_hash, aggregate = await asyncio.shield(submission)
+            except asyncio.CancelledError:
+                # The send keeps running in its thread; wait for it so the batch is recorded or requeued, then propagate
+                try:
+                    tx_hash, aggregate = await submission
+                except Exception as e:
+                    self._requeue(batch, e)
+                else:
+                    self._record(batch, tx_hash, aggregate)
+                raise
+            except Exception as e:
+                self._requeue(batch, e)
+                return None
+
+            self._record(batch, tx_hash, aggregate)
+            return tx_hash
+
+    async def drain(self):
+        """Shutdown: anchor everything pending, stopping at the first failure"""
+        while self.pending:
+            if await self.flush(force=True) is None:
+                break
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Receipt anchoring loop error: {e}")
+
+class BloomFilter:
+    """Bit-array Bloom filter keyed by SHA-256 digests (double hashing over the digest's first 16 bytes)"""
+
+    MASK64 = (1 << 64) - 1
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.hash_count):
+            yield ((h1 + i * h2) & self.MASK64) % self.size
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def add_many(self, digests: List[bytes]):
+        if np is None:
+            for digest in digests:
+                self.add(digest)
+            return
+        bits = np.frombuffer(self.bits, dtype=np.uint8)
+        for positions in self._vector_positions(digests):
+            np.bitwise_or.at(bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(digests)
+
+    def _vector_positions(self, digests: List[bytes]):
+        words = np.frombuffer(b"".join(d[:16] for d in digests), dtype="<u8").reshape(len(digests), 2)
+        h1, h2 = words[:, 0], words[:, 1] | np.uint64(1)
+        for i in range(self.hash_count):
+            yield (h1 + np.uint64(i) * h2) % np.uint64(self.size)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def contains_many(self, digests: List[bytes]) -> List[bool]:
+        """Vectorized membership test for bulk lookups"""
+        if np is None or not digests:
+            return [digest in self for digest in digests]
+        bits = np.frombuffer(self.bits, dtype=np.uint8)
+        present = np.ones(len(digests), dtype=bool)
+        for positions in self._vector_positions(digests):
+            present &= (bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1 == 1
+        return present.tolist()
+
+class ReceiptStore:
+    """SQLite receipt index with a background batch writer and an in-memory Bloom filter for negative lookups"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS receipts (
+            receipt BLOB PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            score_digest BLOB NOT NULL
+        ) WITHOUT ROWID
+    """
+    BATCH_SIZE = 1000
+    WRITE_RETRY_MAX_SECONDS = 30.0
+
+    def __init__(self, path: str = RECEIPT_STORE_PATH, capacity: int = RECEIPT_BLOOM_CAPACITY,
+                 false_positive_rate: float = RECEIPT_BLOOM_FPR):
+        self.path = path
+        self.bloom = BloomFilter(capacity, false_positive_rate)
+        self.bloom_ready = False
+        self.pending: Dict[bytes, Tuple[int, str, bytes]] = {}
+        self.write_queue: "queue.Queue[Optional[Tuple[bytes, int, str, bytes]]]" = queue.Queue()
+        self.local = threading.local()
+        self.closing = threading.Event()
+        self.stats = {"lookups": 0, "bloom_rejections": 0, "bloom_false_positives": 0, "writes": 0, "write_errors": 0}
+
+        with self._connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(self.SCHEMA)
+
+        self.writer = threading.Thread(target=self._write_loop, name="receipt-store-writer", daemon=True)
+        self.writer.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    @staticmethod
+    def score_digest(scores: Dict[str, float]) -> str:
+        """SHA-256 of the scores as returned to the client (sorted-key JSON)"""
+        return hashlib.sha256(json.dumps(scores, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _parse(receipt: str) -> Optional[bytes]:
+        try:
+            digest = bytes.fromhex(receipt)
+        except ValueError:
+            return None
+        return digest if len(digest) == 32 else None
+
+    def load_bloom(self) -> int:
+        """Populate the Bloom filter from disk; until this finishes every lookup goes to SQLite"""
+        loaded = 0
+        connection = sqlite3.connect(self.path)
+        cursor = connection.execute("SELECT receipt FROM receipts")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            self.bloom.add_many([receipt for (receipt,) in rows])
+            loaded += len(rows)
+        connection.close()
+        self.bloom_ready = True
+        return loaded
+
+    def record(self, receipt: str, model: str, scores: Dict[str, float], timestamp: Optional[int] = None):
+        """Index a receipt immediately in memory; the SQLite insert happens on the writer thread"""
+        digest = self._parse(receipt)
+        if digest is None:
+            return
+        row = (int(timestamp or time.time()), model, bytes.fromhex(self.score_digest(scores)))
+        self.pending[digest] = row
+        self.bloom.add(digest)
+        self.write_queue.put((digest, *row))
+
+    def _write_loop(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            item = self.write_queue.get()
+            batch = [item] if item is not None else []
+            while item is not None and len(batch) < self.BATCH_SIZE:
+                try:
+                    item = self.write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    batch.append(item)
+
+            if batch:
+                # Failed rows stay in `pending` (so lookups still find them) and are retried with backoff
+                delay = 0.5
+                while not self._write_batch(connection, batch):
+                    if self.closing.is_set():
+                        logger.error(f"Receipt store closing with {len(self.pending)} receipts not persisted")
+                        break
+                    self.closing.wait(delay)
+                    delay = min(delay * 2, self.WRITE_RETRY_MAX_SECONDS)
+
+            if item is None:
+                connection.close()
+                return
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: List[Tuple[bytes, int, str, bytes]]) -> bool:
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO receipts (receipt, timestamp, model, score_digest) VALUES (?, ?, ?, ?)",
+                batch
+            )
+            connection.commit()
+        except sqlite3.Error as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"Receipt store write error, keeping {len(batch)} receipts pending for retry: {e}")
+            with suppress(sqlite3.Error):
+                connection.rollback()
+            return False
+
+        self.stats["writes"] += len(batch)
+        for row in batch:
+            self.pending.pop(row[0], None)
+        return True
+
+    def _row(self, receipt: str, row: Tuple[int, str, bytes]) -> Dict[str, Any]:
+        return {"receipt": receipt, "timestamp": row[0], "model": row[1], "score_digest": row[2].hex()}
+
+    def definitely_absent(self, receipt: str) -> bool:
+        """In-memory check (malformed id or Bloom negative); cheap enough to run on the event loop"""
+        digest = self._parse(receipt)
+        if digest is None:
+            return True
+        if self.bloom_ready and digest not in self.bloom:
+            self.stats["lookups"] += 1
+            self.stats["bloom_rejections"] += 1
+            return True
+        return False
+
+    def lookup(self, receipt: str) -> Optional[Dict[str, Any]]:
+        self.stats["lookups"] += 1
+        digest = self._parse(receipt)
+        if digest is None:
+            return None
+        if self.bloom_ready and digest not in self.bloom:
+            self.stats["bloom_rejections"] += 1
+            return None
+
+        row = self.pending.get(digest)
+        if row is None:
+            row = self._connection().execute(
+                "SELECT timestamp, model, score_digest FROM receipts WHERE receipt = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            self.stats["bloom_false_positives"] += 1
+            return None
+        return self._row(receipt.lower(), row)
+
+    def lookup_many(self, receipts: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Bulk lookup: one vectorized Bloom pass, then a single batched SQLite query for the survivors"""
+        self.stats["lookups"] += len(receipts)
+        parsed = {receipt: self._parse(receipt) for receipt in receipts}
+        candidates = [(receipt, digest) for receipt, digest in parsed.items() if digest is not None]
+
+        if self.bloom_ready and candidates:
+            mask = self.bloom.contains_many([digest for _, digest in candidates])
+            self.stats["bloom_rejections"] += mask.count(False)
+            candidates = [candidate for candidate, present in zip(candidates, mask) if present]
+
+        found: Dict[str, Dict[str, Any]] = {}
+        remaining = []
+        for receipt, digest in candidates:
+            row = self.pending.get(digest)
+            if row is not None:
+                found[receipt] = self._row(receipt.lower(), row)
+            else:
+                remaining.append((receipt, digest))
+
+        connection = self._connection()
+        for start in range(0, len(remaining), 500):
+            chunk = remaining[start:start + 500]
+            by_digest = {digest: receipt for receipt, digest in chunk}
+            placeholders = ",".join("?" * len(chunk))
+            rows = connection.execute(
+                f"SELECT receipt, timestamp, model, score_digest FROM receipts WHERE receipt IN ({placeholders})",
+                [digest for _, digest in chunk]
+            ).fetchall()
+            for digest, *row in rows:
+                receipt = by_digest[digest]
+                found[receipt] = self._row(receipt.lower(), tuple(row))
+
+        self.stats["bloom_false_positives"] += len(remaining) - sum(1 for r, _ in remaining if r in found)
+        return found
+
+    def close(self):
+        self.closing.set()
+        self.write_queue.put(None)
+        self.writer.join(timeout=10)
+
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: Any) -> Optional[Any]:
+        entry = self.entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, (expires, _) in self.entries.items() if expires < now]
+        for key in expired:
+            del self.entries[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class StripeGateway:
+    """Runs blocking Stripe SDK calls on a bounded pool and caches intents and subscriptions"""
+
+    TERMINAL_STATUSES = {"succeeded", "canceled"}
+
+    def __init__(self, max_workers: int = STRIPE_MAX_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stripe")
+        self.intents = TTLCache(max_size=50000, ttl=STRIPE_INTENT_CACHE_TTL)
+        self.idempotent_creates = TTLCache(max_size=50000, ttl=24 * 3600)
+        self.subscriptions = TTLCache(max_size=50000, ttl=30 * 24 * 3600)
+        # Event ids already applied; queued ones are tracked separately so a failed event can be redelivered
+        self.seen_events = TTLCache(max_size=100000, ttl=3 * 24 * 3600)
+        self.queued_events: set = set()
+        self.webhook_queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=STRIPE_WEBHOOK_QUEUE_SIZE)
+        self.stats = {"stripe_calls": 0, "webhooks_received": 0, "webhooks_processed": 0, "webhooks_duplicate": 0,
+                      "webhooks_failed": 0}
+
+    async def _call(self, fn: Callable, *args, **kwargs):
+        self.stats["stripe_calls"] += 1
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    @staticmethod
+    def _snapshot(intent: Any) -> Dict[str, Any]:
+        metadata = getattr(intent, "metadata", None) or {}
+        return {
+            "id": intent.id,
+            "status": intent.status,
+            "amount": intent.amount,
+            "currency": intent.currency,
+            "client_secret": getattr(intent, "client_secret", None),
+            "metadata": metadata.to_dict() if hasattr(metadata, "to_dict") else dict(metadata)
+        }
+
+    def _cache_intent(self, snapshot: Dict[str, Any]):
+        terminal = snapshot["status"] in self.TERMINAL_STATUSES
+        self.intents.set(snapshot["id"], snapshot, None if terminal else STRIPE_PENDING_INTENT_TTL)
+
+    async def create_intent(self, request: PaymentIntentRequest, idempotency_key: Optional[str]) -> Dict[str, Any]:
+        # Like Stripe, an idempotency key only replays a request with the same parameters
+        fingerprint = (request.tier_id, request.customer_email)
+        if idempotency_key:
+            cached = self.idempotent_creates.get(idempotency_key)
+            if cached:
+                if cached[0] != fingerprint:
+                    raise HTTPException(status_code=400, detail="Idempotency-Key was already used with different parameters")
+                return cached[1]
+
+        amount, currency = TIER_PRICES[request.tier_id]
+        intent = await self._call(
+            stripe.PaymentIntent.create,
+            amount=amount,
+            currency=currency,
+            metadata={
+                'tier_id': request.tier_id,
+                'customer_email': request.customer_email or 'anonymous@stealthscore.com'
+            },
+            idempotency_key=idempotency_key or str(uuid.uuid4())
+        )
+
+        snapshot = self._snapshot(intent)
+        self._cache_intent(snapshot)
+        if idempotency_key:
+            self.idempotent_creates.set(idempotency_key, (fingerprint, snapshot))
+        return snapshot
+
+    async def get_intent(self, intent_id: str) -> Dict[str, Any]:
+        """Cached intent; terminal states are kept for the full TTL, pending ones only briefly"""
+        cached = self.intents.get(intent_id)
+        if cached:
+            return cached
+        snapshot = self._snapshot(await self._call(stripe.PaymentIntent.retrieve, intent_id))
+        self._cache_intent(snapshot)
+        return snapshot
+
+    @staticmethod
+    def paid_tier(intent: Dict[str, Any]) -> str:
+        """Tier from the server-set metadata, only if the intent paid that tier's exact price; raises ValueError otherwise"""
+        tier_id = intent["metadata"].get("tier_id")
+        if tier_id not in TIER_PRICES:
+            raise ValueError(f"Unknown tier {tier_id!r}")
+        amount, currency = TIER_PRICES[tier_id]
+        if intent["amount"] != amount or str(intent["currency"]).lower() != currency:
+            raise ValueError(f"Paid {intent['amount']} {intent['currency']} does not match tier {tier_id}")
+        return tier_id
+
+    def activate_subscription(self, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Idempotent: the same succeeded intent always maps to the same subscription"""
+        existing = self.subscriptions.get(intent["id"])
+        if existing:
+            return existing
+
+        tier_id = self.paid_tier(intent)
+        now = int(time.time())
+        subscription = {
+            # Bearer token for /score; the entitlement store only keeps its hash
+            "subscription_id": f"sub_{secrets.token_urlsafe(32)}",
+            "tier_id": tier_id,
+            "payment_intent_id": intent["id"],
+            "customer_email": intent["metadata"].get("customer_email"),
+            "activated_at": now,
+            "expires_at": now + (30 * 24 * 60 * 60)  # 30 days
+        }
+        self.subscriptions.set(intent["id"], subscription)
+        entitlement_store.grant(subscription["subscription_id"], tier_id, subscription["expires_at"])
+        return subscription
+
+    def enqueue_event(self, event: Any) -> bool:
+        self.stats["webhooks_received"] += 1
+        if event.id in self.queued_events or self.seen_events.get(event.id):
+            self.stats["webhooks_duplicate"] += 1
+            return True
+        try:
+            self.webhook_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        self.queued_events.add(event.id)
+        return True
+
+    def apply_event(self, event: Any):
+        if not event.type.startswith("payment_intent."):
+            return
+        snapshot = self._snapshot(event.data.object)
+        self._cache_intent(snapshot)
+        if snapshot["status"] == "succeeded":
+            try:
+                self.activate_subscription(snapshot)
+            except ValueError as e:
+                logger.warning(f"⚠️ Not activating {snapshot['id']}: {e}")
+
+    async def process_events(self):
+        while True:
+            event = await self.webhook_queue.get()
+            try:
+                self.apply_event(event)
+                # Only applied events count as seen; a failed one is processed again if Stripe (or the dashboard) resends it
+                self.seen_events.set(event.id, True)
+                self.stats["webhooks_processed"] += 1
+            except Exception as e:
+                self.stats["webhooks_failed"] += 1
+                logger.error(f"Stripe webhook {event.id} processing error: {type(e).__name__}")
+            finally:
+                self.queued_events.discard(event.id)
+                self.webhook_queue.task_done()
+
+    async def drain(self, timeout: float = STRIPE_WEBHOOK_DRAIN_SECONDS) -> bool:
+        """Shutdown: wait for acknowledged events to be applied; False if some were still queued at the timeout"""
+        try:
+            await asyncio.wait_for(self.webhook_queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.error(f"Stripe webhook queue not drained: {self.webhook_queue.qsize()} acknowledged events unapplied")
+            return False
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+class EntitlementStore:
+    """Subscription tiers in Redis behind an in-process read-through cache, with atomic per-period usage counters"""
+
+    TIER_QUOTAS: Dict[str, Optional[int]] = {"free": FREE_TIER_QUOTA, "pro": None, "enterprise": None}
+    MISSING = object()
+
+    def __init__(self, cache_ttl: float = ENTITLEMENT_CACHE_TTL, period_seconds: int = QUOTA_PERIOD_SECONDS):
+        self.period_seconds = period_seconds
+        self.cache = TTLCache(max_size=100000, ttl=cache_ttl)
+        self.local_entitlements: Dict[str, Dict[str, Any]] = {}
+        self.local_usage: Dict[str, int] = {}
+        self.local_period: Optional[int] = None
+        self.stats = {"checks": 0, "denied": 0, "redis_reads": 0, "refunds": 0}
+
+    def _period(self) -> int:
+        return int(time.time() // self.period_seconds)
+
+    @staticmethod
+    def token_key(subscription_id: str) -> str:
+        """Entitlements and usage are keyed by the token's hash, never the bearer token itself"""
+        return hashlib.sha256(subscription_id.encode("utf-8")).hexdigest()
+
+    def grant(self, subscription_id: str, tier: str, expires_at: int):
+        entitlement = {"tier": tier, "expires_at": int(expires_at)}
+        token_key = self.token_key(subscription_id)
+        self.local_entitlements[token_key] = entitlement
+        self.cache.set(token_key, entitlement)
+        if redis_client:
+            try:
+                key = f"entitlement:{token_key}"
+                pipe = redis_client.pipeline()
+                pipe.hset(key, mapping=entitlement)
+                pipe.expireat(key, int(expires_at))
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Entitlement persistence error: {e}")
+
+    async def resolve(self, subscription_id: str) -> Optional[Dict[str, Any]]:
+        """Read-through lookup; unknown ids are negatively cached so bad tokens never hammer Redis"""
+        token_key = self.token_key(subscription_id)
+        cached = self.cache.get(token_key)
+        if cached is not None:
+            return None if cached is self.MISSING else cached
+
+        entitlement = self.local_entitlements.get(token_key)
+        if entitlement is None and redis_client:
+            self.stats["redis_reads"] += 1
+            try:
+                stored = await asyncio.to_thread(redis_client.hgetall, f"entitlement:{token_key}")
+                if stored:
+                    entitlement = {"tier": stored["tier"], "expires_at": int(stored["expires_at"])}
+            except Exception as e:
+                logger.error(f"Entitlement lookup error: {e}")
+
+        self.cache.set(token_key, entitlement if entitlement is not None else self.MISSING)
+        return entitlement
+
+    def _redis_incr(self, key: str) -> int:
+        pipe = redis_client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, self.period_seconds * 2)
+        return int(pipe.execute()[0])
+
+    async def _consume(self, subject: str) -> int:
+        period = self._period()
+        key = f"usage:{subject}:{period}"
+        if redis_client:
+            try:
+                return await asyncio.to_thread(self._redis_incr, key)
+            except Exception as e:
+                logger.error(f"Quota counter error, using local counter: {e}")
+
+        if period != self.local_period:
+            self.local_usage.clear()
+            self.local_period = period
+        self.local_usage[key] = self.local_usage.get(key, 0) + 1
+        return self.local_usage[key]
+
+    async def check(self, subscription_id: Optional[str], client_id: str) -> Tuple[str, str, Optional[int]]:
+        """Return (tier, usage subject, remaining quota); raises 401/429 when the call is not allowed"""
+        self.stats["checks"] += 1
+        tier, subject = "free", f"anon:{client_id}"
+
+        if subscription_id:
+            entitlement = await self.resolve(subscription_id)
+            if entitlement is None:
+                raise HTTPException(status_code=401, detail="Unknown subscription")
+            subject = f"sub:{self.token_key(subscription_id)}"
+            if entitlement["expires_at"] > time.time():
+                tier = entitlement["tier"]
+
+        quota = self.TIER_QUOTAS.get(tier, FREE_TIER_QUOTA)
+        if quota is None:
+            return tier, subject, None
+
+        used = await self._consume(subject)
+        if used > quota:
+            self.stats["denied"] += 1
+            retry_after = self.period_seconds - int(time.time()) % self.period_seconds
+            raise HTTPException(
+                status_code=429,
+                detail=f"Quota exceeded for {tier} tier",
+                headers={"Retry-After": str(retry_after), "X-Quota-Limit": str(quota)}
+            )
+        return tier, subject, quota - used
+
+    async def refund(self, subject: str):
+        """Give back a unit of quota when the evaluation itself failed"""
+        self.stats["refunds"] += 1
+        key = f"usage:{subject}:{self._period()}"
+        try:
+            if redis_client:
+                await asyncio.to_thread(redis_client.decr, key)
+            elif key in self.local_usage:
+                self.local_usage[key] -= 1
+        except Exception as e:
+            logger.error(f"Quota refund error: {e}")
+
+class DIDVerifier:
+    """Verifies DID proofs (signature over a challenge) for did:key, did:ethr and did:pkh identifiers"""
+
+    BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    MULTICODEC_KEYS = {b"\xed\x01": "ed25519", b"\xe7\x01": "secp256k1"}
+
+    def __init__(self, max_workers: int = DID_VERIFY_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="did-verify")
+        self.keys = TTLCache(max_size=10000, ttl=3600)
+        # Outstanding server-issued challenges: challenge -> DID it was issued for; each is single-use.
+        # Never LRU-evicted: issuance is refused when full so a flood cannot push out other callers' challenges
+        self.challenges = TTLCache(max_size=DID_CHALLENGE_CAPACITY, ttl=DID_CHALLENGE_TTL)
+        # DID -> its challenges, oldest first; a DID's own oldest challenge is dropped past DID_CHALLENGES_PER_DID
+        self.did_challenges = TTLCache(max_size=DID_CHALLENGE_CAPACITY, ttl=DID_CHALLENGE_TTL)
+        # Caller -> [tokens, last refill] issuance bucket
+        self.issue_buckets = TTLCache(max_size=100000, ttl=max(DID_CHALLENGE_BURST / max(DID_CHALLENGE_RATE, 1e-9), 1.0))
+        self.lock = threading.Lock()
+        self.stats = {"verifications": 0, "challenges_issued": 0, "challenge_rejections": 0, "issue_rejections": 0,
+                      "key_cache_hits": 0, "failures": 0}
+
+    def admit(self, caller: str, count: int) -> Optional[float]:
+        """None if `caller` may be issued `count` challenges now, otherwise seconds to wait"""
+        with self.lock:
+            if len(self.challenges) + count > self.challenges.max_size:
+                self.challenges.purge_expired()
+                if len(self.challenges) + count > self.challenges.max_size:
+                    self.stats["issue_rejections"] += 1
+                    return DID_CHALLENGE_TTL
+
+            now = time.monotonic()
+            bucket = self.issue_buckets.get(caller) or [float(DID_CHALLENGE_BURST), now]
+            tokens = min(float(DID_CHALLENGE_BURST), bucket[0] + (now - bucket[1]) * DID_CHALLENGE_RATE)
+            if tokens < count:
+                self.issue_buckets.set(caller, [tokens, now])
+                self.stats["issue_rejections"] += 1
+                return (count - tokens) / DID_CHALLENGE_RATE if DID_CHALLENGE_RATE > 0 else DID_CHALLENGE_TTL
+            self.issue_buckets.set(caller, [tokens - count, now])
+            return None
+
+    def issue_challenge(self, did: str) -> Tuple[str, int]:
+        """New single-use challenge bound to `did`; returns (challenge, expires_at)"""
+        expires_at = int(time.time() + DID_CHALLENGE_TTL)
+        challenge = f"stealthscore:did-auth:{did}:{secrets.token_urlsafe(24)}:{expires_at}"
+        with self.lock:
+            issued = self.did_challenges.get(did) or []
+            while len(issued) >= DID_CHALLENGES_PER_DID:
+                self.challenges.pop(issued.pop(0))
+            issued.append(challenge)
+            self.did_challenges.set(did, issued)
+            self.challenges.set(challenge, did)
+        self.stats["challenges_issued"] += 1
+        return challenge, expires_at
+
+    @classmethod
+    def _base58_decode(cls, value: str) -> bytes:
+        number = 0
+        for char in value:
+            number = number * 58 + cls.BASE58_ALPHABET.index(char)
+        leading_zeros = len(value) - len(value.lstrip("1"))
+        return b"\x00" * leading_zeros + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+    @staticmethod
+    def _decode_signature(signature: str) -> bytes:
+        if signature.startswith("0x"):
+            return bytes.fromhex(signature[2:])
+        try:
+            return bytes.fromhex(signature)
+        except ValueError:
+            padded = signature.rstrip("=") + "=" * (-len(signature.rstrip("=")) % 4)
+            return base64.urlsafe_b64decode(padded.replace("+", "-").replace("/", "_"))
+
+    def resolve(self, did: str) -> Optional[Tuple[str, Any]]:
+        """Resolve a DID to (key type, verification material); resolutions are cached"""
+        with self.lock:
+            cached = self.keys.get(did)
+        if cached is not None:
+            self.stats["key_cache_hits"] += 1
+            return cached
+
+        resolved = None
+        parts = did.split(":")
+        if len(parts) == 3 and parts[:2] == ["did", "key"] and parts[2].startswith("z"):
+            decoded = self._base58_decode(parts[2][1:])
+            key_type = self.MULTICODEC_KEYS.get(decoded[:2])
+            if key_type == "ed25519" and len(decoded) == 34:
+                resolved = (key_type, ed25519.Ed25519PublicKey.from_public_bytes(decoded[2:]))
+            elif key_type == "secp256k1" and len(decoded) == 35:
+                resolved = (key_type, ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), decoded[2:]))
+        elif len(parts) >= 3 and parts[:2] in (["did", "ethr"], ["did", "pkh"]):
+            address = parts[-1]
+            if re.fullmatch(r"0x[0-9a-fA-F]{40}", address):
+                resolved = ("eip191", address.lower())
+
+        if resolved is not None:
+            with self.lock:
+                self.keys.set(did, resolved)
+        return resolved
+
+    def _verify_uncached(self, did: str, method: str, message: bytes, signature: bytes) -> bool:
+        resolved = self.resolve(did)
+        if resolved is None:
+            return False
+        key_type, key = resolved
+
+        if key_type == "ed25519":
+            if method != "ed25519":
+                return False
+            key.verify(signature, message)
+            return True
+
+        if method != "secp256k1":
+            return False
+        if key_type == "eip191":
+            if not WEB3_AVAILABLE:
+                return False
+            recovered = Account.recover_message(encode_defunct(primitive=message), signature=signature)
+            return recovered.lower() == key
+
+        if len(signature) == 64:
+            signature = encode_dss_signature(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+        key.verify(signature, message, ec.ECDSA(hashes.SHA256()))
+        return True
+
+    def verify(self, did: str, method: str, proof: Dict[str, Any]) -> bool:
+        """Verify proof["signature"] over a challenge from issue_challenge(); the challenge is consumed either way"""
+        self.stats["verifications"] += 1
+        challenge = proof.get("challenge")
+        signature = proof.get("signature")
+        if not CRYPTO_AVAILABLE or not isinstance(challenge, str) or not isinstance(signature, str):
+            return False
+
+        with self.lock:
+            issued_for = self.challenges.get(challenge)
+            if issued_for is not None:
+                self.challenges.pop(challenge)
+        if issued_for != did:
+            # Unknown, expired, already used, or issued for another DID
+            self.stats["challenge_rejections"] += 1
+            return False
+
+        try:
+            verified = self._verify_uncached(did, method, challenge.encode("utf-8"), self._decode_signature(signature))
+        except Exception as e:
+            # InvalidSignature, malformed keys/encodings and eth-keys BadSignature all mean "not verified"
+            logger.info(f"DID proof rejected: {type(e).__name__}")
+            verified = False
+
+        if not verified:
+            self.stats["failures"] += 1
+        return verified
+
+    async def verify_many(self, requests: List[DecentralizedIdentityRequest]) -> List[bool]:
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self.verify, request.did, request.verification_method, request.proof)
+            for request in requests
+        ))
+
+class ProfileSession(threading.Thread):
+    """Samples one thread's stack at a fixed interval into folded-stack counts"""
+
+    # Frames that mean the event loop is parked waiting for I/O rather than running request code
+    IDLE_FRAMES = {"select", "poll", "epoll", "kqueue"}
+
+    def __init__(self, target_ident: int, interval_ms: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = max(interval_ms, 0.1) / 1000
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.started_at = time.perf_counter()
+        self.duration = 0.0
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            if frame.f_code.co_name in self.IDLE_FRAMES and "selectors" in frame.f_code.co_filename:
+                folded = "[event loop idle]"
+            else:
+                labels = []
+                while frame is not None:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                folded = ";".join(reversed(labels))
+            self.stacks[folded] = self.stacks.get(folded, 0) + 1
+            self.samples += 1
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        self.duration = time.perf_counter() - self.started_at
+
+class RequestProfiler:
+    """Opt-in per-request profiling: an admin header or a sampling rate selects requests, dumps are folded stacks"""
+
+    def __init__(self, directory: str = PROFILING_DIR, admin_token: Optional[str] = PROFILING_ADMIN_TOKEN,
+                 sample_rate: float = PROFILING_SAMPLE_RATE, paths: List[str] = PROFILING_PATHS,
+                 interval_ms: float = PROFILING_INTERVAL_MS, max_files: int = PROFILING_MAX_FILES):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.paths = set(paths)
+        self.interval_ms = interval_ms
+        self.max_files = max_files
+        # One profile at a time: samples cover the whole loop thread, so overlapping sessions would blur together
+        self.busy = threading.Lock()
+        self.rng = random.Random()
+        self.stats = {"profiles": 0, "skipped_busy": 0, "pruned": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def wants(self, request: Request) -> bool:
+        if request.url.path not in self.paths:
+            return False
+        header = request.headers.get("x-profile")
+        if header and self.admin_token and hmac.compare_digest(header, self.admin_token):
+            return True
+        return self.sample_rate > 0 and self.rng.random() < self.sample_rate
+
+    def write(self, profile_id: str, request: Request, status_code: int, session: ProfileSession) -> str:
+        """Write <id>.folded (flamegraph.pl / speedscope / inferno input) plus a JSON sidecar, then prune old dumps"""
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile_id)
+
+        with open(f"{base}.folded", "w") as handle:
+            for stack, count in sorted(session.stacks.items(), key=lambda item: -item[1]):
+                handle.write(f"{stack} {count}\n")
+
+        idle = session.stacks.get("[event loop idle]", 0)
+        with open(f"{base}.json", "w") as handle:
+            json.dump({
+                "id": profile_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": status_code,
+                "duration_ms": round(session.duration * 1000, 3),
+                "interval_ms": self.interval_ms,
+                "samples": session.samples,
+                "idle_samples": idle
+            }, handle)
+
+        self.stats["profiles"] += 1
+        self._prune()
+        return f"{base}.folded"
+
+    def _prune(self):
+        dumps = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".folded")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in dumps[:max(0, len(dumps) - self.max_files)]:
+            for path in (entry.path, entry.path[: -len(".folded")] + ".json"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.stats["pruned"] += 1
+
 privacy_engine = PrivacyEngine()
 federated_engine = FederatedLearningEngine()
 trust_engine = TrustGraphEngine()
+pitch_compactor = PitchCompactor()
+near_duplicate_index = NearDuplicateIndex()
+local_scorer = LocalScorer()
+receipt_accumulator = ReceiptAccumulator()
+
+stripe_gateway = StripeGateway() if STRIPE_AVAILABLE else None
+entitlement_store = EntitlementStore()
+did_verifier = DIDVerifier()
+request_profiler = RequestProfiler()
+
+# Opened at startup (lifespan), so importing the module creates no database file, writer thread or Bloom filter
+receipt_store: Optional[ReceiptStore] = None
+
+receipt_anchor = None
+if w3 and ANCHOR_ENABLED:
+    try:
+        receipt_anchor = ReceiptAnchor(w3)
+        receipt_accumulator.seal_listeners.append(receipt_anchor.enqueue)
+    except Exception as e:
+        logger.warning(f"⚠️ Receipt anchoring disabled: {e}")
+
+def client_address(request: Request) -> str:
+    """Caller's address for anonymous metering; X-Forwarded-For only counts when the direct peer is a trusted proxy"""
+    peer = request.client.host if request.client else "unknown"
+    if peer not in TRUSTED_PROXIES:
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    # Nearest hop first: the first address that is not one of our own proxies is the client (earlier ones are spoofable)
+    for hop in reversed(hops):
+        if hop not in TRUSTED_PROXIES:
+            return hop
+    return hops[0] if hops else peer
 
 def secure_decrypt(ciphertext_b64: str, iv_b64: str, key_b64: str) -> str:
     """Securely decrypt AES-GCM encrypted data (with fallback for demo)"""
@@ -417,35 +2545,32 @@ def secure_decrypt(ciphertext_b64: str, iv_b64: str, key_b64: str) -> str:
         if CRYPTO_AVAILABLE and "InvalidTag" in str(type(e)):
             raise HTTPException(status_code=400, detail="Decryption failed: Invalid authentication tag")
 
-        logger.error(f"Decryption error: {type(e).__name__}")
+        hot_logger.error("Decryption error: %s", type(e).__name__)
 
         try:
             return base64.b64decode(ciphertext_b64).decode('utf-8')
         except:
             return ciphertext_b64
 
-async def call_ai_evaluator(pitch_text: str, use_federated: bool = True) -> Dict[str, float]:
-    """Enhanced AI evaluation with federated learning integration"""
+async def call_ai_evaluator(pitch_text: str, use_federated: bool = True) -> Tuple[Dict[str, float], str]:
+    """Enhanced AI evaluation with federated learning integration; returns (scores, model that produced them)"""
+    local_scores, incomplete = local_scorer.score_with_prefilter(pitch_text, federated_engine.global_model if use_federated else {})
+
     if not OPENROUTER_API_KEY:
-        logger.warning("Using mock scores - OPENROUTER_API_KEY not configured")
-        import random
-        random.seed(len(pitch_text))
-        base_scores = {
-            "clarity": round(random.uniform(6.0, 9.0), 1),
-            "originality": round(random.uniform(5.5, 8.5), 1),
-            "team_strength": round(random.uniform(6.5, 9.5), 1),
-            "market_fit": round(random.uniform(6.0, 8.8), 1)
-        }
+        hot_logger.warning("Using local scorer - OPENROUTER_API_KEY not configured")
+        return local_scores, LOCAL_SCORER_MODEL
 
-        if use_federated:
-            for key, score in base_scores.items():
-                weight_key = f"{key}_weights"
-                if weight_key in federated_engine.global_model:
-                    weights = federated_engine.global_model[weight_key]
-                    adjustment = sum(weights) / len(weights) - 0.25
-                    base_scores[key] = max(0.0, min(10.0, score + adjustment))
+    if incomplete:
+        hot_logger.info("Pitch pre-filtered as incomplete - skipping LLM evaluation")
+        local_scorer.stats["prefiltered"] += 1
+        return local_scores, LOCAL_SCORER_MODEL
 
-        return base_scores
+    def degrade(reason: str, detail: str = "AI evaluation service unavailable") -> Tuple[Dict[str, float], str]:
+        if not LOCAL_SCORER_FALLBACK:
+            raise HTTPException(status_code=500, detail=detail)
+        hot_logger.warning("%s - falling back to local scorer", reason)
+        local_scorer.stats["fallbacks"] += 1
+        return local_scores, LOCAL_SCORER_MODEL
 
     system_prompt = """You are an expert AI evaluator for decentralized fundraising on OnlyFounders.
     Evaluate pitches across multiple dimensions considering Web3 context, decentralized governance,
@@ -460,7 +2585,7 @@ async def call_ai_evaluator(pitch_text: str, use_federated: bool = True) -> Dict
 
     Return valid JSON only: {"clarity": X.X, "originality": X.X, "team_strength": X.X, "market_fit": X.X, "tokenomics": X.X, "governance": X.X}"""
 
-    user_prompt = f"""Pitch for evaluation:\n\"\"\"{pitch_text}\"\"\""""
+    user_prompt = f"""Pitch for evaluation:\n\"\"\"{pitch_compactor.compact(pitch_text)}\"\"\""""
 
     payload = {
         "model": MODEL_NAME,
@@ -481,16 +2606,15 @@ async def call_ai_evaluator(pitch_text: str, use_federated: bool = True) -> Dict
     }
 
     try:
-        response = requests.post(
-            f"{OPENROUTER_BASE_URL}/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
+        if openrouter_client is not None:
+            response = await openrouter_client.post("/chat/completions", json=payload, headers=headers)
+        else:
+            async with httpx.AsyncClient(timeout=OPENROUTER_TIMEOUT) as client:
+                response = await client.post(f"{OPENROUTER_BASE_URL}/chat/completions", json=payload, headers=headers)
 
         if response.status_code != 200:
-            logger.error(f"OpenRouter API error: {response.status_code}")
-            raise HTTPException(status_code=500, detail="AI evaluation service unavailable")
+            hot_logger.error("OpenRouter API error: %s", response.status_code)
+            return degrade(f"OpenRouter returned {response.status_code}")
 
         result = response.json()
         content = result['choices'][0]['message']['content'].strip()
@@ -503,7 +2627,7 @@ async def call_ai_evaluator(pitch_text: str, use_federated: bool = True) -> Dict
             if json_match:
                 scores = json.loads(json_match.group())
             else:
-                raise HTTPException(status_code=500, detail="AI returned invalid JSON")
+                return degrade("AI returned invalid JSON", detail="AI returned invalid JSON")
 
         required_fields = ['clarity', 'originality', 'team_strength', 'market_fit']
         for field in required_fields:
@@ -516,14 +2640,14 @@ async def call_ai_evaluator(pitch_text: str, use_federated: bool = True) -> Dict
             except (ValueError, TypeError):
                 scores[field] = 5.0
 
-        for key in scores:
-            scores[key] = privacy_engine.add_differential_privacy_noise(scores[key])
+        return privacy_engine.noise_scores(scores), MODEL_NAME
 
-        return scores
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"AI evaluation request failed: {e}")
-        raise HTTPException(status_code=500, detail="AI evaluation service unavailable")
+    except httpx.HTTPError as e:
+        hot_logger.error("AI evaluation request failed: %s", type(e).__name__)
+        return degrade("AI evaluation request failed")
+    except (ValueError, KeyError, IndexError) as e:
+        hot_logger.error("AI evaluation returned a malformed response: %s", type(e).__name__)
+        return degrade("AI returned a malformed response", detail="AI returned invalid JSON")
 
 def generate_privacy_proof(scores: Dict[str, float], method: str = "zk") -> str:
     """Generate privacy proof for score computation"""
@@ -544,9 +2668,9 @@ def generate_privacy_proof(scores: Dict[str, float], method: str = "zk") -> str:
         }
         return base64.b64encode(json.dumps(proof_data).encode()).decode()
 
-def generate_receipt(ciphertext_b64: str, model_name: str, scores: Dict[str, float]) -> str:
+def generate_receipt(ciphertext_b64: str, model_name: str, scores: Dict[str, float], timestamp: Optional[int] = None) -> str:
     """Generate cryptographic receipt for audit trail"""
-    timestamp_unix = str(int(time.time()))
+    timestamp_unix = str(int(timestamp if timestamp is not None else time.time()))
     scores_str = json.dumps(scores, sort_keys=True)
 
     receipt_input = f"{ciphertext_b64}|{model_name}|{timestamp_unix}|{scores_str}"
@@ -556,34 +2680,31 @@ def generate_receipt(ciphertext_b64: str, model_name: str, scores: Dict[str, flo
 
 # Stripe Payment Endpoints
 @app.post("/create-payment-intent", response_model=PaymentIntentResponse)
-async def create_payment_intent(request: PaymentIntentRequest):
+async def create_payment_intent(request: PaymentIntentRequest, idempotency_key: Optional[str] = Header(default=None)):
     """Create a Stripe payment intent"""
     try:
         if not STRIPE_AVAILABLE or not STRIPE_SECRET_KEY:
             raise HTTPException(status_code=503, detail="Payment service unavailable")
 
         logger.info(f"Creating payment intent for tier: {request.tier_id}")
+        if request.tier_id not in TIER_PRICES:
+            raise HTTPException(status_code=400, detail="Unknown tier")
 
-        # Create payment intent with Stripe
-        intent = stripe.PaymentIntent.create(
-            amount=request.amount,
-            currency=request.currency,
-            metadata={
-                'tier_id': request.tier_id,
-                'customer_email': request.customer_email or 'anonymous@stealthscore.com'
-            }
-        )
+        # Create payment intent with Stripe (off the event loop, replay-safe via idempotency key)
+        intent = await stripe_gateway.create_intent(request, idempotency_key)
 
         return PaymentIntentResponse(
-            client_secret=intent.client_secret,
-            payment_intent_id=intent.id,
-            amount=intent.amount,
-            currency=intent.currency
+            client_secret=intent["client_secret"],
+            payment_intent_id=intent["id"],
+            amount=intent["amount"],
+            currency=intent["currency"]
         )
 
     except stripe.error.StripeError as e:
         logger.error(f"Stripe error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Payment intent creation error: {e}")
         raise HTTPException(status_code=500, detail="Payment processing failed")
@@ -597,33 +2718,85 @@ async def confirm_payment(request: PaymentConfirmationRequest):
 
         logger.info(f"Confirming payment: {request.payment_intent_id}")
 
-        # Retrieve payment intent from Stripe
-        intent = stripe.PaymentIntent.retrieve(request.payment_intent_id)
+        # Cached intent (kept fresh by webhooks), falling back to Stripe
+        intent = await stripe_gateway.get_intent(request.payment_intent_id)
 
-        if intent.status == 'succeeded':
-            # Create subscription record
-            subscription_id = f"sub_{int(time.time())}_{request.tier_id}"
-            expires_at = int(time.time()) + (30 * 24 * 60 * 60)  # 30 days
+        if intent["status"] == 'succeeded':
+            try:
+                subscription = stripe_gateway.activate_subscription(intent)
+            except ValueError as e:
+                logger.warning(f"⚠️ Rejected payment {request.payment_intent_id}: {e}")
+                raise HTTPException(status_code=402, detail="Payment does not match the requested tier")
 
             return PaymentConfirmationResponse(
                 success=True,
-                subscription_id=subscription_id,
-                expires_at=expires_at,
+                subscription_id=subscription["subscription_id"],
+                expires_at=subscription["expires_at"],
                 message="Payment successful! Subscription activated."
             )
         else:
             return PaymentConfirmationResponse(
                 success=False,
-                message=f"Payment not completed. Status: {intent.status}"
+                message=f"Payment not completed. Status: {intent['status']}"
             )
 
     except stripe.error.StripeError as e:
         logger.error(f"Stripe error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Payment confirmation error: {e}")
         raise HTTPException(status_code=500, detail="Payment confirmation failed")
 
+@app.post("/stripe/webhook")
+async def stripe_webhook(request: Request):
+    """Verified Stripe webhook; events are applied to the payment cache by a background worker"""
+    if not STRIPE_AVAILABLE or not STRIPE_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook handling unavailable")
+
+    payload = await request.body()
+    try:
+        event = stripe.Webhook.construct_event(payload, request.headers.get("stripe-signature"), STRIPE_WEBHOOK_SECRET)
+    except (ValueError, stripe.error.SignatureVerificationError):
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
+
+    if not stripe_gateway.enqueue_event(event):
+        logger.warning("Stripe webhook queue full - asking Stripe to retry")
+        raise HTTPException(status_code=503, detail="Webhook queue full")
+
+    return {"received": True}
+
+if request_profiler.enabled:
+    # Only registered when configured, so requests pay nothing for profiling by default
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not request_profiler.wants(request):
+            return await call_next(request)
+        if not request_profiler.busy.acquire(blocking=False):
+            request_profiler.stats["skipped_busy"] += 1
+            return await call_next(request)
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.url.path.strip('/').replace('/', '_')}-{uuid.uuid4().hex[:8]}"
+        session = ProfileSession(threading.get_ident(), request_profiler.interval_ms)
+        session.start()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            session.stop()
+            request_profiler.busy.release()
+            try:
+                await asyncio.to_thread(request_profiler.write, profile_id, request, status_code, session)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not write profile {profile_id}: {e}")
+
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    logger.info(f"🔬 Request profiling enabled for {sorted(request_profiler.paths)} -> {request_profiler.directory}/")
+
 # API Endpoints
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -661,18 +2834,47 @@ async def health_check():
     )
 
 @app.post("/score", response_model=ScoreResponse)
-async def score_pitch(request: PitchRequest, background_tasks: BackgroundTasks):
+async def score_pitch(request: PitchRequest, background_tasks: BackgroundTasks, http_request: Request,
+                      credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
     """Main endpoint: Privacy-preserving pitch evaluation with federated learning"""
+    usage_subject = None
+    timer = StageTimer()
     try:
 
-        logger.info("Processing encrypted pitch submission")
+        hot_logger.info("Processing encrypted pitch submission")
         pitch_text = secure_decrypt(request.ciphertext, request.iv, request.aes_key)
+        timer.mark("decrypt")
 
         if len(pitch_text.strip()) < 10:
             raise HTTPException(status_code=400, detail="Pitch text too short")
 
-        logger.info("Calling federated AI evaluator")
-        scores = await call_ai_evaluator(pitch_text, use_federated=True)
+        tier, quota_remaining = None, None
+        if ENTITLEMENTS_ENABLED:
+            tier, usage_subject, quota_remaining = await entitlement_store.check(
+                credentials.credentials if credentials else None, client_address(http_request)
+            )
+            timer.mark("entitlement")
+
+        near_duplicate_similarity = None
+        fingerprint = None
+        match = None
+        if NEAR_DUPLICATE_ENABLED:
+            fingerprint = near_duplicate_index.fingerprint(pitch_text)
+            match = near_duplicate_index.lookup(fingerprint)
+            timer.mark("near_duplicate")
+
+        if match:
+            scores, near_duplicate_similarity = match
+            scored_by = MODEL_NAME
+            hot_logger.info("Reusing scores from near-duplicate pitch (similarity %s)", near_duplicate_similarity)
+        else:
+            hot_logger.info("Calling federated AI evaluator")
+            scores, scored_by = await call_ai_evaluator(pitch_text, use_federated=True)
+            timer.mark("evaluate")
+            # Heuristic scores from the local scorer must not be replayed once the LLM is reachable again
+            if fingerprint is not None and scored_by == MODEL_NAME:
+                near_duplicate_index.add(fingerprint, scores)
+                background_tasks.add_task(persist_near_duplicate, fingerprint, scores)
 
         privacy_proof = generate_privacy_proof(scores, method="zk")
 
@@ -682,26 +2884,41 @@ async def score_pitch(request: PitchRequest, background_tasks: BackgroundTasks):
             if wallet in trust_engine.reputation_scores:
                 trust_score = trust_engine.reputation_scores[wallet]
 
-        receipt = generate_receipt(request.ciphertext, MODEL_NAME, scores)
+        receipt_timestamp = int(time.time())
+        receipt = generate_receipt(request.ciphertext, scored_by, scores, receipt_timestamp)
+        receipt_leaf, receipt_window = receipt_accumulator.add(receipt)
+        if receipt_store:
+            receipt_store.record(receipt, scored_by, scores, receipt_timestamp)
+        timer.mark("receipt")
 
         pitch_text = "X" * len(pitch_text)
         del pitch_text
 
         background_tasks.add_task(log_evaluation_metrics, scores, trust_score)
 
-        logger.info("Pitch evaluation completed successfully")
+        hot_logger.info("Pitch evaluation completed successfully",
+                        extra={"stages": timer.stages, "duration_ms": timer.total_ms(), "near_duplicate": bool(match)})
 
         return ScoreResponse(
             scores=scores,
             receipt=receipt,
             privacy_proof=privacy_proof,
             trust_score=trust_score,
-            federated_confidence=0.85
+            federated_confidence=0.85,
+            near_duplicate_similarity=near_duplicate_similarity,
+            receipt_leaf=receipt_leaf,
+            receipt_window=receipt_window,
+            tier=tier,
+            quota_remaining=quota_remaining
         )
 
-    except HTTPException:
+    except HTTPException as e:
+        if usage_subject and e.status_code >= 500:
+            await entitlement_store.refund(usage_subject)
         raise
     except Exception as e:
+        if usage_subject:
+            await entitlement_store.refund(usage_subject)
         logger.error(f"Unexpected error in score_pitch: {type(e).__name__}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -709,20 +2926,37 @@ async def score_pitch(request: PitchRequest, background_tasks: BackgroundTasks):
 async def update_federated_model(updates: List[FederatedUpdateRequest]):
     """Update global federated learning model"""
     try:
-        logger.info(f"Received {len(updates)} federated updates")
+        hot_logger.info("Received %d federated updates", len(updates))
 
-        new_weights = await federated_engine.aggregate_updates(updates)
+        ledger = federated_engine.privacy_ledger
+        accepted = updates
+        if PRIVACY_BUDGET_ENFORCED:
+            accepted, batch_spend = [], {}
+            for update in updates:
+                spend = batch_spend.get(update.client_id, 0.0) + update.privacy_budget
+                if ledger.allows(update.client_id, spend):
+                    batch_spend[update.client_id] = spend
+                    accepted.append(update)
+            if len(accepted) < len(updates):
+                logger.warning(f"Dropped {len(updates) - len(accepted)} federated updates over their privacy budget")
+            if updates and not accepted:
+                raise HTTPException(status_code=429, detail="Privacy budget exhausted")
 
-        total_budget_used = sum(update.privacy_budget for update in updates)
-        federated_engine.privacy_budget = max(0, federated_engine.privacy_budget - total_budget_used)
+        new_weights = await federated_engine.aggregate_updates(accepted)
+
+        # Only updates that made it into the model spend epsilon
+        for update in accepted:
+            ledger.charge(update.client_id, update.privacy_budget)
 
         return FederatedModelResponse(
             global_weights=new_weights,
             round_number=federated_engine.round_number,
             participants=len(federated_engine.participants),
-            privacy_budget_remaining=federated_engine.privacy_budget
+            privacy_budget_remaining=min((ledger.remaining(u.client_id) for u in accepted), default=ledger.lowest_remaining())
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Federated update error: {e}")
         raise HTTPException(status_code=500, detail="Federated learning update failed")
@@ -731,7 +2965,7 @@ async def update_federated_model(updates: List[FederatedUpdateRequest]):
 async def update_trust_graph(request: TrustGraphRequest):
     """Update trust graph with new reputation data"""
     try:
-        logger.info(f"Updating trust graph for wallet: {request.wallet_address[:10]}...")
+        hot_logger.info("Updating trust graph for wallet: %s...", request.wallet_address[:10])
 
         trust_score = await trust_engine.update_trust_graph(request)
 
@@ -759,16 +2993,139 @@ async def update_trust_graph(request: TrustGraphRequest):
         logger.error(f"Trust graph update error: {e}")
         raise HTTPException(status_code=500, detail="Trust graph update failed")
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
 @app.get("/federated/model")
-async def get_federated_model():
-    """Get current federated learning model"""
+async def get_federated_model(response: Response, client_id: Optional[str] = None,
+                              if_none_match: Optional[str] = Header(default=None)):
+    """Get current federated learning model; returns 304 when If-None-Match carries the current round's ETag"""
+    etag = federated_engine.etag
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    ledger = federated_engine.privacy_ledger
     return {
         "global_weights": federated_engine.global_model,
         "round_number": federated_engine.round_number,
         "participants": len(federated_engine.participants),
-        "privacy_budget_remaining": federated_engine.privacy_budget
+        "privacy_budget_remaining": ledger.remaining(client_id) if client_id else ledger.lowest_remaining()
+    }
+
+@app.get("/federated/model/delta")
+async def get_federated_model_delta(since: str, response: Response,
+                                    if_none_match: Optional[str] = Header(default=None)):
+    """Get only the weights that changed since version `since` (an ETag from this endpoint or /federated/model);
+    falls back to full weights if that version is from another process or its round has aged out"""
+    etag = federated_engine.etag
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    since_round = federated_engine.parse_version(since)
+    if since_round == federated_engine.round_number:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    delta = federated_engine.delta_since(since_round) if since_round is not None else None
+    if delta is None:
+        return {
+            "since": since,
+            "version": etag,
+            "round_number": federated_engine.round_number,
+            "full": True,
+            "global_weights": federated_engine.global_model
+        }
+
+    return {"since": since, "version": etag, "round_number": federated_engine.round_number, "full": False, **delta}
+
+@app.get("/metrics/logging")
+async def get_logging_metrics():
+    """Get log queue depth and drop counts"""
+    queued = isinstance(log_handler, DeferredQueueHandler)
+    hot_filter = next((f for f in hot_logger.filters if isinstance(f, HotPathFilter)), None)
+    return {
+        "format": LOG_FORMAT,
+        "async": queued,
+        "queue_depth": log_handler.queue.qsize() if queued else 0,
+        "queue_capacity": LOG_QUEUE_SIZE if queued else 0,
+        "dropped": log_handler.dropped if queued else 0,
+        "hot_path_suppressed_pending": sum(int(bucket[2]) for bucket in hot_filter.buckets.values()) if hot_filter else 0
     }
 
+@app.get("/metrics/privacy")
+async def get_privacy_metrics():
+    """Get noise pool and privacy budget statistics"""
+    ledger = federated_engine.privacy_ledger
+    return {
+        "noise_pool": {**privacy_engine.noise_pool.stats, "size": privacy_engine.noise_pool.size},
+        "budget_per_client": ledger.budget,
+        "budget_enforced": PRIVACY_BUDGET_ENFORCED,
+        "budget_period_seconds": ledger.period_seconds,
+        "clients": len(ledger.spent),
+        "clients_evicted": ledger.evictions,
+        "total_epsilon_spent": round(ledger.total_spent, 6),
+        "lowest_remaining": ledger.lowest_remaining()
+    }
+
+@app.get("/metrics/compaction")
+async def get_compaction_metrics():
+    """Get pitch compaction statistics"""
+    stats = dict(pitch_compactor.stats)
+    stats["token_budget"] = pitch_compactor.token_budget
+    stats["savings_ratio"] = round(stats["tokens_saved"] / stats["tokens_in"], 4) if stats["tokens_in"] else 0.0
+    return stats
+
+@app.get("/metrics/near-duplicates")
+async def get_near_duplicate_metrics():
+    """Get near-duplicate index statistics"""
+    stats = dict(near_duplicate_index.stats)
+    stats["indexed_pitches"] = len(near_duplicate_index.entries)
+    stats["similarity_threshold"] = near_duplicate_index.similarity
+    stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+    return stats
+
+@app.get("/metrics/local-scorer")
+async def get_local_scorer_metrics():
+    """Get local fast-path scorer statistics"""
+    return dict(local_scorer.stats)
+
+@app.get("/metrics/payments")
+async def get_payment_metrics():
+    """Get Stripe gateway and payment cache statistics"""
+    if not stripe_gateway:
+        return {"enabled": False}
+    stats = dict(stripe_gateway.stats)
+    stats["cached_intents"] = len(stripe_gateway.intents)
+    stats["intent_cache_hits"] = stripe_gateway.intents.hits
+    stats["intent_cache_misses"] = stripe_gateway.intents.misses
+    stats["active_subscriptions"] = len(stripe_gateway.subscriptions)
+    stats["webhook_queue_depth"] = stripe_gateway.webhook_queue.qsize()
+    return stats
+
+@app.get("/metrics/entitlements")
+async def get_entitlement_metrics():
+    """Get entitlement cache and quota statistics"""
+    stats = dict(entitlement_store.stats)
+    cache = entitlement_store.cache
+    lookups = cache.hits + cache.misses
+    stats["cache_hits"] = cache.hits
+    stats["cache_misses"] = cache.misses
+    stats["cache_hit_rate"] = round(cache.hits / lookups, 4) if lookups else 0.0
+    stats["cached_entitlements"] = len(cache)
+    return stats
+
+@app.get("/metrics/identity")
+async def get_identity_metrics():
+    """Get DID verification and cache statistics"""
+    stats = dict(did_verifier.stats)
+    stats["cached_keys"] = len(did_verifier.keys)
+    stats["outstanding_challenges"] = len(did_verifier.challenges)
+    stats["identity_score_cache"] = _identity_score.cache_info()._asdict()
+    return stats
+
 @app.get("/trust-graph/{wallet_address}")
 async def get_trust_score(wallet_address: str):
     """Get trust score for a wallet address"""
@@ -781,6 +3138,111 @@ async def get_trust_score(wallet_address: str):
     else:
         raise HTTPException(status_code=404, detail="Wallet not found in trust graph")
 
+@app.get("/receipts/{receipt}", response_model=ReceiptRecordResponse)
+async def get_receipt(receipt: str):
+    """Look up a stored evaluation receipt"""
+    if not receipt_store:
+        raise HTTPException(status_code=503, detail="Receipt store unavailable")
+    # Bloom negatives are answered inline; anything that may exist goes to SQLite off the event loop
+    record = None if receipt_store.definitely_absent(receipt) else await asyncio.to_thread(receipt_store.lookup, receipt)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    return ReceiptRecordResponse(**record)
+
+@app.post("/receipts/verify/bulk", response_model=BulkReceiptVerificationResponse)
+async def verify_receipts_bulk(request: BulkReceiptVerificationRequest):
+    """Verify many receipts (and optionally their score digests) in one call"""
+    if not receipt_store:
+        raise HTTPException(status_code=503, detail="Receipt store unavailable")
+
+    found = await asyncio.to_thread(receipt_store.lookup_many, [item.receipt for item in request.receipts])
+
+    results = []
+    for item in request.receipts:
+        record = found.get(item.receipt)
+        if record is None:
+            results.append(BulkReceiptVerificationResult(receipt=item.receipt, found=False))
+            continue
+        digest_match = None
+        if item.score_digest is not None:
+            digest_match = item.score_digest.lower() == record["score_digest"]
+        results.append(BulkReceiptVerificationResult(
+            receipt=item.receipt,
+            found=True,
+            digest_match=digest_match,
+            timestamp=record["timestamp"],
+            model=record["model"]
+        ))
+
+    found_count = sum(1 for result in results if result.found)
+    return BulkReceiptVerificationResponse(results=results, found=found_count, missing=len(results) - found_count)
+
+@app.get("/receipts/{receipt}/proof", response_model=ReceiptProofResponse)
+async def get_receipt_proof(receipt: str):
+    """Get the Merkle inclusion proof for a receipt against its window root"""
+    proof = receipt_accumulator.proof(receipt)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    if proof.get("pending"):
+        retry_after = receipt_accumulator.window_seconds - int(time.time()) % receipt_accumulator.window_seconds
+        raise HTTPException(
+            status_code=409,
+            detail=f"Receipt window {proof['window_id']} is still open",
+            headers={"Retry-After": str(retry_after)}
+        )
+    return ReceiptProofResponse(**proof)
+
+@app.post("/receipts/verify", response_model=ReceiptVerificationResponse)
+async def verify_receipt(request: ReceiptVerificationRequest):
+    """Verify a receipt inclusion proof against a window root"""
+    receipt_accumulator.roll()
+    proof = [step.model_dump() for step in request.proof]
+    return ReceiptVerificationResponse(
+        valid=receipt_accumulator.verify(request.receipt, proof, request.root),
+        root_known=request.root.lower() in receipt_accumulator.root_index,
+        window_id=receipt_accumulator.root_index.get(request.root.lower())
+    )
+
+@app.get("/receipts/windows/{window_id}")
+async def get_receipt_window(window_id: int):
+    """Get the Merkle root of a sealed receipt window"""
+    receipt_accumulator.roll()
+    window = receipt_accumulator.windows.get(window_id)
+    if window is None:
+        raise HTTPException(status_code=404, detail="Receipt window not found or not sealed")
+    return {
+        "window_id": window_id,
+        "root": window["root"],
+        "size": len(window["levels"][0]),
+        "window_start": window_id * receipt_accumulator.window_seconds,
+        "window_end": (window_id + 1) * receipt_accumulator.window_seconds,
+        "sealed_at": window["sealed_at"],
+        "anchor_tx": window.get("anchor_tx")
+    }
+
+@app.get("/anchoring/status")
+async def get_anchoring_status():
+    """Get on-chain receipt anchoring status"""
+    if not receipt_anchor:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "sender": receipt_anchor.sender,
+        "interval_seconds": receipt_anchor.interval,
+        "pending_roots": len(receipt_anchor.pending),
+        "consecutive_failures": receipt_anchor.failures,
+        "stats": receipt_anchor.stats,
+        "recent_batches": list(receipt_anchor.history)[-10:]
+    }
+
+TEE_PRIVACY_GUARANTEES = [
+    "Data processed in isolated enclave",
+    "Memory encryption active",
+    "Attestation verified",
+    "No data persistence",
+    "Secure key management"
+]
+
 @app.post("/tee/execute", response_model=TEEResponse)
 async def execute_in_tee(request: TEERequest):
     """Execute computation in simulated Trusted Execution Environment"""
@@ -789,25 +3251,55 @@ async def execute_in_tee(request: TEERequest):
 
         tee_result = privacy_engine.simulate_tee_execution(request.encrypted_data)
 
-        privacy_guarantees = [
-            "Data processed in isolated enclave",
-            "Memory encryption active",
-            "Attestation verified",
-            "No data persistence",
-            "Secure key management"
-        ]
-
         return TEEResponse(
             attestation=tee_result["attestation"],
             result=tee_result["result"],
             tee_status=tee_result["tee_status"],
-            privacy_guarantees=privacy_guarantees
+            privacy_guarantees=TEE_PRIVACY_GUARANTEES
         )
 
     except Exception as e:
         logger.error(f"TEE execution error: {e}")
         raise HTTPException(status_code=500, detail="TEE execution failed")
 
+@app.post("/tee/execute/stream", response_model=TEEResponse)
+async def execute_in_tee_stream(http_request: Request, computation_type: str = "pitch_analysis", attestation_required: bool = True):
+    """Execute a TEE computation over a streamed (raw or chunked transfer-encoded) request body"""
+    try:
+        logger.info(f"Streamed TEE execution requested: {computation_type}")
+
+        declared_length = http_request.headers.get("content-length")
+        if declared_length is not None and not declared_length.strip().isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if declared_length and int(declared_length) > TEE_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="TEE payload too large")
+
+        execution = privacy_engine.start_tee_execution()
+        async for chunk in http_request.stream():
+            if not chunk:
+                continue
+            if execution.bytes_processed + len(chunk) > TEE_MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="TEE payload too large")
+            execution.update(chunk)
+
+        if execution.bytes_processed == 0:
+            raise HTTPException(status_code=400, detail="Empty TEE payload")
+
+        tee_result = execution.finalize()
+
+        return TEEResponse(
+            attestation=tee_result["attestation"],
+            result=tee_result["result"],
+            tee_status=tee_result["tee_status"],
+            privacy_guarantees=TEE_PRIVACY_GUARANTEES
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Streamed TEE execution error: {e}")
+        raise HTTPException(status_code=500, detail="TEE execution failed")
+
 @app.post("/identity/verify", response_model=DecentralizedIdentityResponse)
 async def verify_decentralized_identity(request: DecentralizedIdentityRequest):
     """Verify decentralized identity and calculate reputation score"""
@@ -842,25 +3334,64 @@ async def verify_decentralized_identity(request: DecentralizedIdentityRequest):
         logger.error(f"DID verification error: {e}")
         raise HTTPException(status_code=500, detail="Identity verification failed")
 
+@app.post("/identity/challenge", response_model=IdentityChallengeResponse)
+async def issue_identity_challenges(request: IdentityChallengeRequest, http_request: Request):
+    """Issue single-use challenges to sign; send each back as proof["challenge"] before it expires"""
+    retry_after = did_verifier.admit(client_address(http_request), len(request.dids))
+    if retry_after is not None:
+        raise HTTPException(status_code=429, detail="Too many outstanding identity challenges",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    challenges = []
+    for did in request.dids:
+        challenge, expires_at = did_verifier.issue_challenge(did)
+        challenges.append(IdentityChallenge(did=did, challenge=challenge, expires_at=expires_at))
+    return IdentityChallengeResponse(challenges=challenges)
+
+@app.post("/identity/verify/batch", response_model=IdentityBatchResponse)
+async def verify_decentralized_identity_batch(request: IdentityBatchRequest):
+    """Verify many DID proofs in one call on the verification thread pool"""
+    try:
+        logger.info(f"Batch DID verification requested: {len(request.requests)} proofs")
+
+        verified = await did_verifier.verify_many(request.requests)
+
+        results = [
+            IdentityBatchResult(did=item.did, verified=ok, identity_score=await calculate_identity_score(item.did))
+            for item, ok in zip(request.requests, verified)
+        ]
+        verified_count = sum(1 for result in results if result.verified)
+
+        return IdentityBatchResponse(results=results, verified=verified_count, failed=len(results) - verified_count)
+
+    except Exception as e:
+        logger.error(f"Batch DID verification error: {e}")
+        raise HTTPException(status_code=500, detail="Identity verification failed")
+
 async def verify_did(did: str, method: str, proof: Dict[str, Any]) -> bool:
     """Verify decentralized identity"""
 
-    return len(did) > 20 and method in ["ed25519", "secp256k1"] and "signature" in proof
-
-async def calculate_identity_score(did: str) -> float:
-    """Calculate identity reputation score"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(did_verifier.executor, did_verifier.verify, did, method, proof)
 
+@lru_cache(maxsize=65536)
+def _identity_score(did: str) -> float:
     base_score = 5.0
 
     length_bonus = min(len(did) / 100, 2.0)
 
-    import random
-    random.seed(hash(did))
-    random_component = random.uniform(-1.0, 3.0)
+    # Private RNG seeded from a stable digest: deterministic across restarts, no global state touched
+    seed = int.from_bytes(hashlib.sha256(did.encode("utf-8")).digest()[:8], "big")
+    random_component = random.Random(seed).uniform(-1.0, 3.0)
 
     final_score = max(0.0, min(10.0, base_score + length_bonus + random_component))
     return round(final_score, 2)
 
+async def calculate_identity_score(did: str) -> float:
+    """Calculate identity reputation score"""
+
+    return _identity_score(did)
+
 async def log_evaluation_metrics(scores: Dict[str, float], trust_score: Optional[float]):
     """Log evaluation metrics for monitoring"""
     try:
@@ -876,6 +3407,13 @@ async def log_evaluation_metrics(scores: Dict[str, float], trust_score: Optional
     except Exception as e:
         logger.error(f"Metrics logging error: {e}")
 
+async def persist_near_duplicate(fingerprint: int, scores: Dict[str, float]):
+    """Persist a near-duplicate fingerprint to Redis"""
+    try:
+        near_duplicate_index.persist(fingerprint, scores)
+    except Exception as e:
+        logger.error(f"Near-duplicate persistence error: {e}")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(_: Request, exc: Exception):
     """Global exception handler to prevent data leakage"""
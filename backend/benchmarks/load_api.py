@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the Stealth Score API.
+
+Boots the mock OpenRouter and the FastAPI app in-process, drives the
+selected endpoints at a fixed concurrency and writes a JSON report with
+throughput, latency percentiles, event-loop lag and RSS.
+
+    cd backend
+    python benchmarks/load_api.py --concurrency 32 --requests 2000
+    python benchmarks/load_api.py --output after.json --compare before.json
+
+Redis: uses REDIS_URL when reachable, otherwise fakeredis if installed,
+otherwise runs without Redis (reported in the results).
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+
+ENDPOINTS = ["score", "federated_update", "trust_graph_update", "health"]
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def current_rss_mb() -> float:
+    """Resident set size of this process (server + load generator)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def encrypt_pitch(text: str) -> Dict[str, str]:
+    """Build a /score payload the same way the frontend does (AES-256-GCM)"""
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        key = os.urandom(32)
+        iv = os.urandom(12)
+        ciphertext = AESGCM(key).encrypt(iv, text.encode("utf-8"), None)
+    except ImportError:
+        key, iv, ciphertext = b"demo-key", b"demo-iv", text.encode("utf-8")
+        ciphertext = bytes(c ^ key[i % len(key)] for i, c in enumerate(ciphertext))
+
+    return {
+        "ciphertext": base64.b64encode(ciphertext).decode(),
+        "iv": base64.b64encode(iv).decode(),
+        "aes_key": base64.b64encode(key).decode()
+    }
+
+PITCH_SENTENCES = [
+    "We are building a decentralized credit protocol for emerging-market SMEs.",
+    "Our team includes two ex-Coinbase engineers and a former central bank economist.",
+    "The addressable market is $5T of unmet SME credit demand.",
+    "We have onboarded 40 pilot merchants and grow 20% month over month.",
+    "Tokenomics: a fee-sharing governance token with 4-year vesting.",
+    "Governance is handled by an on-chain DAO with quadratic voting.",
+    "Revenue comes from a 1% origination fee on every loan.",
+    "Competitors rely on centralized underwriting and charge 40% APR.",
+    "We are raising a $3M seed round to expand to three new countries.",
+    "Our risk model uses on-chain cash-flow data instead of credit bureaus."
+]
+
+def sample_pitch(index: int) -> str:
+    """Distinct pitch per index so the near-duplicate index does not short-circuit /score"""
+    rng = random.Random(index)
+    sentences = [rng.choice(PITCH_SENTENCES) + f" Detail {rng.getrandbits(48):x}." for _ in range(16)]
+    return f"Pitch #{index}. " + " ".join(sentences)
+
+def build_request(endpoint: str, index: int) -> Dict[str, Any]:
+    if endpoint == "score":
+        body = encrypt_pitch(sample_pitch(index))
+        body["metadata"] = {"wallet_address": f"0x{index % 64:040x}"}
+        return {"method": "POST", "url": "/score", "json": body}
+    if endpoint == "federated_update":
+        weights = {
+            "clarity_weights": [0.1, 0.2, 0.3, 0.4],
+            "originality_weights": [0.15, 0.25, 0.35, 0.25],
+            "team_strength_weights": [0.2, 0.3, 0.3, 0.2],
+            "market_fit_weights": [0.25, 0.25, 0.25, 0.25]
+        }
+        updates = [
+            {"model_weights": weights, "client_id": f"client_{index}_{n}", "privacy_budget": 0.0001, "local_samples": 10 + n}
+            for n in range(4)
+        ]
+        return {"method": "POST", "url": "/federated/update", "json": updates}
+    if endpoint == "trust_graph_update":
+        return {"method": "POST", "url": "/trust-graph/update", "json": {
+            "wallet_address": f"0x{index % 1024:040x}",
+            "connections": [f"0x{(index + n) % 1024:040x}" for n in range(8)],
+            "reputation_score": (index % 100) / 10.0
+        }}
+    if endpoint == "health":
+        return {"method": "GET", "url": "/health"}
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+class ServerHarness:
+    """Runs the app under uvicorn on its own thread and event loop, with a lag probe on that loop"""
+
+    def __init__(self, port: int, probe_interval_ms: float):
+        self.port = port
+        self.probe_interval = probe_interval_ms / 1000
+        self.lag_samples: List[float] = []
+        self.probing = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server = None
+
+    async def _lag_probe(self):
+        while True:
+            expected = time.perf_counter() + self.probe_interval
+            await asyncio.sleep(self.probe_interval)
+            if self.probing:
+                self.lag_samples.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def start(self, app):
+        import uvicorn
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.create_task(self._lag_probe())
+            self.loop.run_until_complete(self.server.serve())
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        deadline = time.time() + 15
+        while not self.server.started:
+            if time.time() > deadline or not thread.is_alive():
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.01)
+
+    def stop(self):
+        if self.server:
+            self.server.should_exit = True
+
+async def drive_endpoint(client: httpx.AsyncClient, endpoint: str, total: int, concurrency: int,
+                         harness: ServerHarness, warmup: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+
+    async def run_batch(batch: List[Dict[str, Any]], workers: int, record: Callable[[float, int], None]):
+        pending = iter(batch)
+
+        async def worker():
+            for spec in pending:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(spec["method"], spec["url"], json=spec.get("json"))
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                record((time.perf_counter() - start) * 1000, status)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(batch))))))
+
+    def record(latency_ms: float, status: int):
+        latencies.append(latency_ms)
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+
+    if warmup:
+        await run_batch([build_request(endpoint, i) for i in range(warmup)], concurrency, lambda *_: None)
+    measured = [build_request(endpoint, warmup + i) for i in range(total)]
+
+    harness.lag_samples.clear()
+    harness.probing = True
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+
+    await run_batch(measured, concurrency, record)
+
+    elapsed = time.perf_counter() - started
+    harness.probing = False
+    lag = list(harness.lag_samples)
+
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "status_counts": status_counts,
+        "error_rate": round(sum(c for s, c in status_counts.items() if s != "200") / max(len(latencies), 1), 4),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies), 3) if latencies else 0.0
+        },
+        "event_loop_lag_ms": {
+            "p50": round(percentile(lag, 50), 3),
+            "p99": round(percentile(lag, 99), 3),
+            "max": round(max(lag), 3) if lag else 0.0
+        },
+        "rss_mb": {"before": round(rss_before, 1), "after": round(current_rss_mb(), 1)}
+    }
+
+def configure_redis(app_module, mode: str) -> str:
+    if mode == "none":
+        app_module.redis_client = None
+        return "none"
+    if mode in ("auto", "local") and app_module.redis_client is not None:
+        return "local"
+    if mode in ("auto", "memory"):
+        try:
+            import fakeredis
+            app_module.redis_client = fakeredis.FakeRedis(decode_responses=True)
+            return "memory"
+        except ImportError:
+            if mode == "memory":
+                raise SystemExit("--redis memory requires the fakeredis package")
+    if mode == "local":
+        raise SystemExit(f"--redis local requested but {app_module.REDIS_URL} is not reachable")
+    app_module.redis_client = None
+    return "none"
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    lines = [f"Comparison vs {baseline.get('git_revision') or 'baseline'}:"]
+    for endpoint, result in current["results"].items():
+        previous = baseline.get("results", {}).get(endpoint)
+        if not previous:
+            continue
+        for label, path in (("rps", ("throughput_rps",)), ("p50", ("latency_ms", "p50")),
+                            ("p99", ("latency_ms", "p99")), ("lag p99", ("event_loop_lag_ms", "p99"))):
+            now, before = result, previous
+            for key in path:
+                now, before = now[key], before[key]
+            delta = ((now - before) / before * 100) if before else 0.0
+            lines.append(f"  {endpoint:<20} {label:<8} {before:>10.2f} -> {now:>10.2f} ({delta:+.1f}%)")
+    return lines
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    import mock_openrouter
+
+    mock_openrouter.run_in_thread(port=args.mock_port, config=mock_openrouter.MockConfig(
+        latency=args.mock_latency,
+        error_rate=args.mock_error_rate,
+        malformed_rate=args.mock_malformed_rate,
+        seed=42
+    ))
+
+    os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{args.mock_port}/api/v1"
+    os.environ.setdefault("OPENROUTER_API_KEY", "mock")
+
+    import app as app_module
+    redis_mode = configure_redis(app_module, args.redis)
+    app_module.entitlement_store.grant("sub_benchmark", args.tier, int(time.time()) + 86400)
+
+    harness = ServerHarness(args.port, args.probe_interval)
+    harness.start(app_module.app)
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Authorization": "Bearer sub_benchmark"}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60,
+                                 headers=headers) as client:
+        for endpoint in args.endpoints:
+            results[endpoint] = await drive_endpoint(
+                client, endpoint, args.requests, args.concurrency, harness, args.warmup
+            )
+            summary = results[endpoint]
+            print(f"{endpoint:<20} {summary['throughput_rps']:>9.1f} rps  "
+                  f"p50 {summary['latency_ms']['p50']:>8.2f} ms  p99 {summary['latency_ms']['p99']:>8.2f} ms  "
+                  f"lag p99 {summary['event_loop_lag_ms']['p99']:>7.2f} ms  errors {summary['error_rate']:.2%}")
+
+    harness.stop()
+
+    return {
+        "benchmark": "load_api",
+        "timestamp": int(time.time()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "mock_latency": args.mock_latency,
+            "mock_error_rate": args.mock_error_rate,
+            "mock_malformed_rate": args.mock_malformed_rate,
+            "redis": redis_mode,
+            "tier": args.tier
+        },
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Stealth Score end-to-end load benchmark")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mock-port", type=int, default=8099)
+    parser.add_argument("--mock-latency", default="lognormal:200:0.4")
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--tier", default="enterprise", help="Entitlement tier granted to the benchmark client")
+    parser.add_argument("--redis", choices=["auto", "local", "memory", "none"], default="auto")
+    parser.add_argument("--probe-interval", type=float, default=10.0, help="Event-loop lag probe interval (ms)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"📊 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        print("\n".join(compare_reports(report, baseline)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Event-loop latency of /score with logging off, synchronous, and queued.
+
+Runs the app under uvicorn with the local scorer (no OpenRouter calls, so the
+request path is pure CPU plus logging) and writes every log line to a sink
+that stalls for --sink-latency ms per write, standing in for a slow stderr
+pipe or log shipper.
+
+    cd backend
+    python benchmarks/logging_pipeline.py --requests 1000 --sink-latency 2
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import httpx
+
+MODES = ["off", "sync", "async", "async-sampled"]
+
+class SlowStream:
+    """File-like sink that blocks on every write"""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        time.sleep(self.latency)
+        self.writes += 1
+        return len(text)
+
+    def flush(self):
+        pass
+
+def configure_mode(app_module, mode: str, sink: SlowStream, log_format: str):
+    if mode == "off":
+        handler = app_module.configure_logging(log_format=log_format, use_queue=False, stream=sink, level="ERROR")
+    else:
+        handler = app_module.configure_logging(log_format=log_format, use_queue=mode != "sync", stream=sink, level="INFO")
+
+    # Only the sampled mode rate-limits hot-path messages; the others log every line
+    for log_filter in app_module.hot_logger.filters:
+        if isinstance(log_filter, app_module.HotPathFilter):
+            log_filter.rate = app_module.LOG_HOT_PATH_RATE if mode == "async-sampled" else 0
+            log_filter.buckets.clear()
+    return handler
+
+async def run_benchmark(args):
+    os.environ.pop("OPENROUTER_API_KEY", None)
+
+    import app as app_module
+    from load_api import ServerHarness, drive_endpoint
+
+    app_module.redis_client = None
+    # Every mode replays the same pitches; near-duplicate reuse would make later modes take a cheaper path
+    app_module.NEAR_DUPLICATE_ENABLED = False
+    app_module.entitlement_store.grant("sub_benchmark", "enterprise", int(time.time()) + 86400)
+
+    harness = ServerHarness(args.port, args.probe_interval)
+    harness.start(app_module.app)
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=120,
+                                 headers={"Authorization": "Bearer sub_benchmark"}) as client:
+        for mode in args.modes:
+            sink = SlowStream(args.sink_latency)
+            handler = configure_mode(app_module, mode, sink, args.format)
+            summary = await drive_endpoint(client, "score", args.requests, args.concurrency, harness, args.warmup)
+            summary["sink_writes"] = sink.writes
+            summary["dropped"] = getattr(handler, "dropped", 0)
+            results[mode] = summary
+            print(f"{mode:<14} {summary['throughput_rps']:>9.1f} rps  p50 {summary['latency_ms']['p50']:>8.2f} ms  "
+                  f"p99 {summary['latency_ms']['p99']:>8.2f} ms  lag p99 {summary['event_loop_lag_ms']['p99']:>7.2f} ms  "
+                  f"lag max {summary['event_loop_lag_ms']['max']:>7.2f} ms  writes {sink.writes}  dropped {summary['dropped']}")
+
+    harness.stop()
+    app_module.configure_logging()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging pipeline event-loop latency benchmark")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sink-latency", type=float, default=2.0, help="Blocking time per log write (ms)")
+    parser.add_argument("--format", choices=["text", "json"], default="json")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--probe-interval", type=float, default=5.0, help="Event-loop lag probe interval (ms)")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"benchmark": "logging_pipeline", "sink_latency_ms": args.sink_latency, "results": results}, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
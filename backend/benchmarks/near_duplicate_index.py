@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for NearDuplicateIndex lookups at scale.
+
+    cd backend
+    python benchmarks/near_duplicate_index.py --entries 300000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import NearDuplicateIndex
+
+def main():
+    parser = argparse.ArgumentParser(description="NearDuplicateIndex lookup benchmark")
+    parser.add_argument("--entries", type=int, default=300000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--similarity", type=float, default=0.92)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = NearDuplicateIndex(similarity=args.similarity, capacity=args.entries)
+    scores = {"clarity": 7.0, "originality": 6.5, "team_strength": 8.0, "market_fit": 7.2}
+
+    fingerprints = [rng.getrandbits(64) for _ in range(args.entries)]
+    started = time.perf_counter()
+    for fingerprint in fingerprints:
+        index.add(fingerprint, scores)
+    print(f"Indexed {args.entries} fingerprints in {time.perf_counter() - started:.2f}s "
+          f"({index.max_distance}-bit threshold, {len(index.bands)} bands)")
+
+    def near(fingerprint: int) -> int:
+        for bit in rng.sample(range(64), rng.randint(0, index.max_distance)):
+            fingerprint ^= 1 << bit
+        return fingerprint
+
+    queries = [near(rng.choice(fingerprints)) if i % 2 else rng.getrandbits(64) for i in range(args.lookups)]
+    timings = []
+    hits = 0
+    for query in queries:
+        started = time.perf_counter()
+        hits += index.lookup(query) is not None
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    timings.sort()
+    print(f"Lookups: {args.lookups}  hits: {hits}  "
+          f"mean {statistics.fmean(timings):.1f}us  p50 {timings[len(timings) // 2]:.1f}us  "
+          f"p99 {timings[int(len(timings) * 0.99)]:.1f}us  max {timings[-1]:.1f}us")
+
+    text = "We are building a decentralized credit protocol for emerging-market SMEs. " * 20
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.fingerprint(text)
+    print(f"Fingerprint ({len(text)} chars): {(time.perf_counter() - started) * 1000:.1f}us")
+
+if __name__ == "__main__":
+    main()
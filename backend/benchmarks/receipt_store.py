@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark for ReceiptStore lookups at scale.
+
+Bulk-loads random receipts straight into SQLite, rebuilds the Bloom
+filter the way startup does, then times unknown (Bloom-rejected), known
+and bulk lookups.
+
+    cd backend
+    python benchmarks/receipt_store.py --receipts 20000000 --path /tmp/receipts_bench.db
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import sqlite3
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ReceiptStore
+
+def timed(label: str, fn, items):
+    timings = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    print(f"{label:<28} mean {statistics.fmean(timings):7.2f}us  p50 {timings[len(timings) // 2]:7.2f}us  "
+          f"p99 {timings[int(len(timings) * 0.99)]:7.2f}us")
+
+def main():
+    parser = argparse.ArgumentParser(description="ReceiptStore lookup benchmark")
+    parser.add_argument("--receipts", type=int, default=2000000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--bulk-size", type=int, default=1000)
+    parser.add_argument("--fpr", type=float, default=0.001)
+    parser.add_argument("--path", default="receipts_bench.db")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.path + suffix):
+            os.remove(args.path + suffix)
+
+    rng = random.Random(11)
+    store = ReceiptStore(path=args.path, capacity=max(args.receipts, 1), false_positive_rate=args.fpr)
+
+    started = time.perf_counter()
+    connection = sqlite3.connect(args.path)
+    connection.execute("PRAGMA synchronous=OFF")
+    sample = []
+    chunk = 100000
+    for offset in range(0, args.receipts, chunk):
+        rows = [(rng.randbytes(32), 1700000000, "mistralai/mistral-small", rng.randbytes(32))
+                for _ in range(min(chunk, args.receipts - offset))]
+        connection.executemany("INSERT OR IGNORE INTO receipts VALUES (?, ?, ?, ?)", rows)
+        sample.extend(row[0].hex() for row in rows[:max(1, args.lookups // (args.receipts // chunk + 1))])
+    connection.commit()
+    connection.close()
+    print(f"Inserted {args.receipts} receipts in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    store.load_bloom()
+    print(f"Bloom rebuild: {time.perf_counter() - started:.1f}s  "
+          f"({len(store.bloom.bits) / 1e6:.1f} MB, {store.bloom.hash_count} hashes)")
+
+    unknown = [rng.randbytes(32).hex() for _ in range(args.lookups)]
+    timed("unknown (Bloom reject)", store.lookup, unknown)
+    timed("known (SQLite hit)", store.lookup, sample)
+    print(f"Bloom false positives: {store.stats['bloom_false_positives']} / {args.lookups}")
+
+    batch = sample[:args.bulk_size // 2] + unknown[:args.bulk_size // 2]
+    started = time.perf_counter()
+    found = store.lookup_many(batch)
+    print(f"bulk lookup of {len(batch)}: {(time.perf_counter() - started) * 1000:.1f}ms ({len(found)} found)")
+
+    store.close()
+
+if __name__ == "__main__":
+    main()
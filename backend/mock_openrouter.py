@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Local OpenRouter stand-in for benchmarks and offline testing.
+
+Serves an OpenRouter-compatible ``/chat/completions`` endpoint (plain and
+streaming) with configurable latency, error rates, 429 bursts and malformed
+responses. Point the backend at it with:
+
+    python mock_openrouter.py --port 8099 --latency lognormal:250:0.5
+    export OPENROUTER_BASE_URL=http://127.0.0.1:8099/api/v1
+    export OPENROUTER_API_KEY=mock
+"""
+
+import os
+import json
+import time
+import math
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+SCORE_FIELDS = ["clarity", "originality", "team_strength", "market_fit", "tokenomics", "governance"]
+
+@dataclass
+class MockConfig:
+    """Failure-injection knobs; every field can be changed at runtime via /mock/config"""
+    latency: str = "fixed:0"          # fixed:MS | uniform:LO:HI | normal:MEAN:STD | lognormal:MEDIAN:SIGMA | exp:MEAN
+    error_rate: float = 0.0           # fraction of requests answered with a 500/502/503
+    malformed_rate: float = 0.0       # fraction with a truncated body or non-JSON message content
+    burst_every_s: float = 0.0        # start a 429 burst every N seconds (0 disables bursts)
+    burst_duration_s: float = 0.0     # length of each 429 burst
+    retry_after_s: int = 1            # Retry-After header sent with 429s
+    stream_chunk_delay_ms: float = 5.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "MockConfig":
+        config = cls()
+        for field_name, default in asdict(config).items():
+            raw = os.getenv(f"MOCK_OPENROUTER_{field_name.upper()}")
+            if raw is None:
+                continue
+            if field_name == "latency":
+                setattr(config, field_name, raw)
+            elif field_name == "seed" or isinstance(default, int) and not isinstance(default, bool):
+                setattr(config, field_name, int(raw))
+            else:
+                setattr(config, field_name, float(raw))
+        return config
+
+def sample_latency_ms(spec: str, rng: random.Random) -> float:
+    """Draw one latency sample (milliseconds) from a ``kind:param[:param]`` spec"""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+
+    if kind == "fixed":
+        return values[0] if values else 0.0
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(max(values[0], 1e-3)), values[1])
+    if kind == "exp":
+        return rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+class MockOpenRouter:
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.rng = random.Random(self.config.seed)
+        self.started_at = time.monotonic()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "malformed": 0, "streamed": 0}
+
+    def reconfigure(self, updates: Dict[str, Any]) -> MockConfig:
+        for key, value in updates.items():
+            if hasattr(self.config, key):
+                setattr(self.config, key, value)
+        if "seed" in updates:
+            self.rng = random.Random(self.config.seed)
+        if "burst_every_s" in updates:
+            self.started_at = time.monotonic()
+        return self.config
+
+    def in_rate_limit_burst(self) -> bool:
+        if self.config.burst_every_s <= 0 or self.config.burst_duration_s <= 0:
+            return False
+        elapsed = time.monotonic() - self.started_at
+        return (elapsed % self.config.burst_every_s) < self.config.burst_duration_s
+
+    def score_content(self, payload: Dict[str, Any]) -> str:
+        """Deterministic scores derived from the prompt so repeated pitches score the same"""
+        prompt = "".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        scores = {field: round(4.0 + (digest[i] / 255.0) * 5.5, 1) for i, field in enumerate(SCORE_FIELDS)}
+        return json.dumps(scores)
+
+    def completion_body(self, payload: Dict[str, Any], content: str) -> Dict[str, Any]:
+        return {
+            "id": f"gen-mock-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": sum(len(str(m.get("content", ""))) for m in payload.get("messages", [])) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": 0
+            }
+        }
+
+    async def stream_chunks(self, payload: Dict[str, Any], content: str, malformed: bool):
+        model = payload.get("model", "mock")
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+
+        for index, piece in enumerate(pieces):
+            if malformed and index == len(pieces) // 2:
+                yield "data: {\"choices\": [{\"delta\": \n\n"
+                continue
+            chunk = {
+                "id": f"gen-mock-{self.stats['requests']}",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            if self.config.stream_chunk_delay_ms > 0:
+                await asyncio.sleep(self.config.stream_chunk_delay_ms / 1000)
+
+        final = {
+            "id": f"gen-mock-{self.stats['requests']}",
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def handle_completion(self, payload: Dict[str, Any], authorization: Optional[str]) -> Response:
+        self.stats["requests"] += 1
+        config = self.config
+
+        if not authorization or not authorization.startswith("Bearer "):
+            self.stats["errors"] += 1
+            return JSONResponse(status_code=401, content={"error": {"message": "No auth credentials found", "code": 401}})
+
+        delay_ms = sample_latency_ms(config.latency, self.rng)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        if self.in_rate_limit_burst():
+            self.stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit exceeded", "code": 429}},
+                headers={"Retry-After": str(config.retry_after_s)}
+            )
+
+        if self.rng.random() < config.error_rate:
+            self.stats["errors"] += 1
+            status = self.rng.choice([500, 502, 503])
+            return JSONResponse(status_code=status, content={"error": {"message": "Upstream provider error", "code": status}})
+
+        content = self.score_content(payload)
+        malformed = self.rng.random() < config.malformed_rate
+        if malformed:
+            self.stats["malformed"] += 1
+
+        if payload.get("stream"):
+            self.stats["streamed"] += 1
+            return StreamingResponse(self.stream_chunks(payload, content, malformed), media_type="text/event-stream")
+
+        if malformed:
+            if self.rng.random() < 0.5:
+                body = json.dumps(self.completion_body(payload, content))
+                return Response(content=body[: len(body) // 2], media_type="application/json")
+            return JSONResponse(content=self.completion_body(payload, "Sure! Here is my evaluation of the pitch."))
+
+        self.stats["ok"] += 1
+        return JSONResponse(content=self.completion_body(payload, content))
+
+def create_mock_app(config: Optional[MockConfig] = None) -> FastAPI:
+    mock = MockOpenRouter(config or MockConfig.from_env())
+    mock_app = FastAPI(title="Mock OpenRouter", docs_url=None, redoc_url=None)
+    mock_app.state.mock = mock
+
+    @mock_app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        try:
+            payload = await request.json()
+        except json.JSONDecodeError:
+            return JSONResponse(status_code=400, content={"error": {"message": "Invalid JSON body", "code": 400}})
+        return await mock.handle_completion(payload, request.headers.get("authorization"))
+
+    @mock_app.get("/api/v1/models")
+    async def list_models():
+        return {"data": [{"id": "mistralai/mistral-small", "name": "Mock Mistral Small"}]}
+
+    @mock_app.get("/mock/config")
+    async def get_config():
+        return {"config": asdict(mock.config), "stats": mock.stats}
+
+    @mock_app.post("/mock/config")
+    async def update_config(updates: Dict[str, Any]):
+        if "latency" in updates:
+            sample_latency_ms(updates["latency"], mock.rng)
+        return {"config": asdict(mock.reconfigure(updates))}
+
+    return mock_app
+
+def run_in_thread(host: str = "127.0.0.1", port: int = 8099, config: Optional[MockConfig] = None):
+    """Start the mock server on a daemon thread; returns the uvicorn server once it is accepting requests"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_mock_app(config), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError(f"Mock OpenRouter failed to start on {host}:{port}")
+        time.sleep(0.01)
+
+    return server
+
+def main():
+    defaults = MockConfig.from_env()
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in with latency and failure injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", default=defaults.latency,
+                        help="fixed:MS | uniform:LO:HI | normal:MEAN:STD | lognormal:MEDIAN:SIGMA | exp:MEAN")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate)
+    parser.add_argument("--burst-every", type=float, default=defaults.burst_every_s)
+    parser.add_argument("--burst-duration", type=float, default=defaults.burst_duration_s)
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after_s)
+    parser.add_argument("--stream-chunk-delay", type=float, default=defaults.stream_chunk_delay_ms)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    sample_latency_ms(args.latency, random.Random())
+
+    config = MockConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        burst_every_s=args.burst_every,
+        burst_duration_s=args.burst_duration,
+        retry_after_s=args.retry_after,
+        stream_chunk_delay_ms=args.stream_chunk_delay,
+        seed=args.seed
+    )
+
+    import uvicorn
+    print(f"🧪 Mock OpenRouter listening on http://{args.host}:{args.port}/api/v1")
+    uvicorn.run(create_mock_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Local Stripe stand-in for payment-flow tests and benchmarks.
+
+Implements the PaymentIntent create/retrieve calls the backend makes
+(honoring Idempotency-Key), plus test hooks that move an intent to a new
+status and deliver a correctly signed webhook. Point the backend at it with:
+
+    python mock_stripe.py --port 8098 --webhook-url http://127.0.0.1:8000/stripe/webhook
+    export STRIPE_API_BASE=http://127.0.0.1:8098
+    export STRIPE_SECRET_KEY=sk_test_mock
+    export STRIPE_WEBHOOK_SECRET=whsec_mock
+"""
+
+import os
+import hmac
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import threading
+from typing import Dict, Any, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+def sign_webhook(payload: str, secret: str, timestamp: Optional[int] = None) -> str:
+    """Build a Stripe-Signature header value for a webhook payload"""
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.{payload}".encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+def parse_form(form) -> Dict[str, Any]:
+    """Unflatten Stripe's form encoding (metadata[tier_id]=x) into nested dicts"""
+    parsed: Dict[str, Any] = {}
+    for key, value in form.multi_items():
+        if "[" in key and key.endswith("]"):
+            outer, inner = key[:-1].split("[", 1)
+            parsed.setdefault(outer, {})[inner] = value
+        else:
+            parsed[key] = value
+    return parsed
+
+class MockStripe:
+    def __init__(self, webhook_secret: str = "whsec_mock", webhook_url: Optional[str] = None, latency_ms: float = 0.0):
+        self.webhook_secret = webhook_secret
+        self.webhook_url = webhook_url
+        self.latency_ms = latency_ms
+        self.intents: Dict[str, Dict[str, Any]] = {}
+        self.idempotency: Dict[str, str] = {}
+        self.stats = {"create": 0, "retrieve": 0, "idempotent_replays": 0, "webhooks_sent": 0}
+
+    async def simulate_latency(self):
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def create_intent(self, params: Dict[str, Any], idempotency_key: Optional[str]) -> Dict[str, Any]:
+        self.stats["create"] += 1
+        if idempotency_key and idempotency_key in self.idempotency:
+            self.stats["idempotent_replays"] += 1
+            return self.intents[self.idempotency[idempotency_key]]
+
+        intent_id = f"pi_mock_{uuid.uuid4().hex[:24]}"
+        intent = {
+            "id": intent_id,
+            "object": "payment_intent",
+            "amount": int(params.get("amount", 0)),
+            "currency": params.get("currency", "usd"),
+            "client_secret": f"{intent_id}_secret_{uuid.uuid4().hex[:16]}",
+            "status": "requires_payment_method",
+            "metadata": params.get("metadata", {}),
+            "created": int(time.time()),
+            "livemode": False
+        }
+        self.intents[intent_id] = intent
+        if idempotency_key:
+            self.idempotency[idempotency_key] = intent_id
+        return intent
+
+    async def send_webhook(self, intent: Dict[str, Any], event_type: str, url: Optional[str]) -> Optional[int]:
+        target = url or self.webhook_url
+        if not target:
+            return None
+        event = {
+            "id": f"evt_mock_{uuid.uuid4().hex[:24]}",
+            "object": "event",
+            "type": event_type,
+            "created": int(time.time()),
+            "livemode": False,
+            "data": {"object": intent}
+        }
+        payload = json.dumps(event)
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.post(target, content=payload, headers={
+                "Content-Type": "application/json",
+                "Stripe-Signature": sign_webhook(payload, self.webhook_secret)
+            })
+        self.stats["webhooks_sent"] += 1
+        return response.status_code
+
+def not_found(intent_id: str) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"error": {
+        "type": "invalid_request_error",
+        "code": "resource_missing",
+        "message": f"No such payment_intent: '{intent_id}'",
+        "param": "intent"
+    }})
+
+def create_mock_app(mock: Optional[MockStripe] = None) -> FastAPI:
+    mock = mock or MockStripe(
+        webhook_secret=os.getenv("MOCK_STRIPE_WEBHOOK_SECRET", "whsec_mock"),
+        webhook_url=os.getenv("MOCK_STRIPE_WEBHOOK_URL"),
+        latency_ms=float(os.getenv("MOCK_STRIPE_LATENCY_MS", "0"))
+    )
+    mock_app = FastAPI(title="Mock Stripe", docs_url=None, redoc_url=None)
+    mock_app.state.mock = mock
+
+    @mock_app.post("/v1/payment_intents")
+    async def create_payment_intent(request: Request):
+        await mock.simulate_latency()
+        params = parse_form(await request.form())
+        return mock.create_intent(params, request.headers.get("idempotency-key"))
+
+    @mock_app.get("/v1/payment_intents/{intent_id}")
+    async def retrieve_payment_intent(intent_id: str):
+        await mock.simulate_latency()
+        mock.stats["retrieve"] += 1
+        intent = mock.intents.get(intent_id)
+        return intent if intent else not_found(intent_id)
+
+    @mock_app.post("/mock/payment_intents/{intent_id}/{status}")
+    async def set_status(intent_id: str, status: str, webhook_url: Optional[str] = None):
+        """Test hook: move an intent to a status and deliver the matching signed webhook"""
+        intent = mock.intents.get(intent_id)
+        if not intent:
+            return not_found(intent_id)
+        intent["status"] = status
+        event_type = {
+            "succeeded": "payment_intent.succeeded",
+            "canceled": "payment_intent.canceled",
+            "processing": "payment_intent.processing",
+            "requires_payment_method": "payment_intent.payment_failed"
+        }.get(status, "payment_intent.updated")
+        webhook_status = await mock.send_webhook(intent, event_type, webhook_url)
+        return {"intent": intent, "event_type": event_type, "webhook_status": webhook_status}
+
+    @mock_app.get("/mock/stats")
+    async def get_stats():
+        return mock.stats
+
+    return mock_app
+
+def run_in_thread(host: str = "127.0.0.1", port: int = 8098, mock: Optional[MockStripe] = None):
+    """Start the mock server on a daemon thread; returns the uvicorn server once it is accepting requests"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_mock_app(mock), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError(f"Mock Stripe failed to start on {host}:{port}")
+        time.sleep(0.01)
+
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Stripe stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--webhook-url", default=os.getenv("MOCK_STRIPE_WEBHOOK_URL"))
+    parser.add_argument("--webhook-secret", default=os.getenv("MOCK_STRIPE_WEBHOOK_SECRET", "whsec_mock"))
+    parser.add_argument("--latency", type=float, default=float(os.getenv("MOCK_STRIPE_LATENCY_MS", "0")),
+                        help="Added latency per API call (ms)")
+    args = parser.parse_args()
+
+    import uvicorn
+    mock = MockStripe(webhook_secret=args.webhook_secret, webhook_url=args.webhook_url, latency_ms=args.latency)
+    print(f"🧪 Mock Stripe listening on http://{args.host}:{args.port}")
+    uvicorn.run(create_mock_app(mock), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Shared test setup. The app reads its configuration at import time, so the
+environment is pinned here before `app` is imported: no Redis, no chain, no
+OpenRouter key (the local scorer answers /score), receipts in a temp SQLite
+file, and Stripe pointed at mock_stripe.py on a free local port.
+
+    cd backend
+    python -m pytest -q
+"""
+
+import os
+import sys
+import socket
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+MOCK_STRIPE_PORT = free_port()
+TEST_DIR = tempfile.mkdtemp(prefix="stealthscore-tests-")
+
+os.environ.pop("OPENROUTER_API_KEY", None)
+os.environ.update({
+    "LOG_ASYNC": "false",
+    "REDIS_URL": "redis://127.0.0.1:1",
+    "WEB3_PROVIDER_URL": "http://127.0.0.1:1",
+    "ANCHOR_ENABLED": "false",
+    "NEAR_DUPLICATE_ENABLED": "false",
+    "ENTITLEMENTS_ENABLED": "true",
+    "FREE_TIER_QUOTA": "3",
+    "RECEIPT_STORE_PATH": os.path.join(TEST_DIR, "receipts.db"),
+    "RECEIPT_BLOOM_CAPACITY": "10000",
+    "STRIPE_SECRET_KEY": "sk_test_mock",
+    "STRIPE_API_BASE": f"http://127.0.0.1:{MOCK_STRIPE_PORT}",
+    "STRIPE_WEBHOOK_SECRET": "whsec_mock",
+    "STRIPE_MAX_NETWORK_RETRIES": "0",
+    # Intents are moved to "succeeded" through the mock's test hook, so /confirm-payment must re-read them
+    "STRIPE_PENDING_INTENT_TTL": "0",
+})
+
+import app as app_module
+import mock_stripe
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def stripe_mock():
+    mock = mock_stripe.MockStripe()
+    server = mock_stripe.run_in_thread(port=MOCK_STRIPE_PORT, mock=mock)
+    yield mock
+    server.should_exit = True
+
+@pytest.fixture(scope="session")
+def client():
+    # Shutdown closes the app's executors and receipt store for good, so the lifespan runs once per session
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def entitlements(monkeypatch):
+    """Fresh entitlement store per test so quota counters never leak between tests"""
+    store = app_module.EntitlementStore()
+    monkeypatch.setattr(app_module, "entitlement_store", store)
+    return store
@@ -0,0 +1,176 @@
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+import app as app_module
+
+# RFC 8032 section 7.1, TEST 1
+ED25519_SECRET = bytes.fromhex("9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60")
+ED25519_PUBLIC = bytes.fromhex("d75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a")
+SECP256K1_SECRET = 0x4C0883A69102937D6231471B5DBB6204FE5129617082792AE468D01A3F362318
+ETH_SECRET = "0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+
+def base58_encode(data: bytes) -> str:
+    alphabet = app_module.DIDVerifier.BASE58_ALPHABET
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = alphabet[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\x00"))) + encoded
+
+class Ed25519Signer:
+    method = "ed25519"
+
+    def __init__(self):
+        self.key = ed25519.Ed25519PrivateKey.from_private_bytes(ED25519_SECRET)
+        public = self.key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        self.did = "did:key:z" + base58_encode(b"\xed\x01" + public)
+
+    def sign(self, message: str) -> str:
+        return self.key.sign(message.encode()).hex()
+
+class Secp256k1Signer:
+    method = "secp256k1"
+
+    def __init__(self, raw: bool = False):
+        self.key = ec.derive_private_key(SECP256K1_SECRET, ec.SECP256K1())
+        public = self.key.public_key().public_bytes(serialization.Encoding.X962, serialization.PublicFormat.CompressedPoint)
+        self.did = "did:key:z" + base58_encode(b"\xe7\x01" + public)
+        self.raw = raw
+
+    def sign(self, message: str) -> str:
+        der = self.key.sign(message.encode(), ec.ECDSA(hashes.SHA256()))
+        if not self.raw:
+            return der.hex()
+        r, s = decode_dss_signature(der)
+        return (r.to_bytes(32, "big") + s.to_bytes(32, "big")).hex()
+
+class EthereumSigner:
+    method = "secp256k1"
+
+    def __init__(self, did_format: str):
+        self.account = Account.from_key(ETH_SECRET)
+        self.did = did_format.format(address=self.account.address)
+
+    def sign(self, message: str) -> str:
+        signature = self.account.sign_message(encode_defunct(text=message)).signature.hex()
+        return signature if signature.startswith("0x") else "0x" + signature
+
+SIGNERS = {
+    "did:key ed25519": Ed25519Signer,
+    "did:key secp256k1 DER": Secp256k1Signer,
+    "did:key secp256k1 raw": lambda: Secp256k1Signer(raw=True),
+    "did:ethr": lambda: EthereumSigner("did:ethr:{address}"),
+    "did:pkh": lambda: EthereumSigner("did:pkh:eip155:1:{address}"),
+}
+
+@pytest.fixture
+def verifier(monkeypatch):
+    did_verifier = app_module.DIDVerifier(max_workers=1)
+    monkeypatch.setattr(app_module, "did_verifier", did_verifier)
+    yield did_verifier
+    did_verifier.executor.shutdown(wait=False)
+
+@pytest.fixture(params=SIGNERS.values(), ids=SIGNERS.keys())
+def signer(request):
+    return request.param()
+
+def signed_proof(verifier, signer, did=None):
+    challenge, _ = verifier.issue_challenge(did or signer.did)
+    return {"challenge": challenge, "signature": signer.sign(challenge)}
+
+def flip_last_byte(signature: str) -> str:
+    return signature[:-2] + format(int(signature[-2:], 16) ^ 0x01, "02x")
+
+def test_ed25519_did_key_resolves_to_rfc8032_key(verifier):
+    key_type, key = verifier.resolve(Ed25519Signer().did)
+    assert key_type == "ed25519"
+    assert key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw) == ED25519_PUBLIC
+
+def test_valid_proof_verifies(verifier, signer):
+    assert verifier.verify(signer.did, signer.method, signed_proof(verifier, signer))
+    assert verifier.stats["failures"] == 0
+
+def test_tampered_signature_fails(verifier, signer):
+    proof = signed_proof(verifier, signer)
+    proof["signature"] = flip_last_byte(proof["signature"])
+    assert not verifier.verify(signer.did, signer.method, proof)
+    assert verifier.stats["failures"] == 1
+
+def test_signature_over_another_challenge_fails(verifier, signer):
+    proof = signed_proof(verifier, signer)
+    other, _ = verifier.issue_challenge(signer.did)
+    assert not verifier.verify(signer.did, signer.method, {"challenge": other, "signature": proof["signature"]})
+
+def test_replayed_proof_fails(verifier, signer):
+    proof = signed_proof(verifier, signer)
+    assert verifier.verify(signer.did, signer.method, proof)
+    assert not verifier.verify(signer.did, signer.method, proof)
+    assert verifier.stats["challenge_rejections"] == 1
+
+def test_challenge_issued_for_another_did_fails(verifier, signer):
+    proof = signed_proof(verifier, signer, did="did:key:zSomeoneElse")
+    assert not verifier.verify(signer.did, signer.method, proof)
+    assert verifier.stats["challenge_rejections"] == 1
+    # Presenting it for the wrong DID burns the challenge
+    assert len(verifier.challenges) == 0
+
+def test_unissued_challenge_fails(verifier, signer):
+    challenge = f"stealthscore:did-auth:{signer.did}:made-up:9999999999"
+    assert not verifier.verify(signer.did, signer.method, {"challenge": challenge, "signature": signer.sign(challenge)})
+    assert verifier.stats["challenge_rejections"] == 1
+
+def test_expired_challenge_fails(verifier, signer):
+    proof = signed_proof(verifier, signer)
+    verifier.challenges.set(proof["challenge"], signer.did, ttl=-1)
+    assert not verifier.verify(signer.did, signer.method, proof)
+    assert verifier.stats["challenge_rejections"] == 1
+
+def test_wrong_verification_method_fails(verifier):
+    signer = Ed25519Signer()
+    assert not verifier.verify(signer.did, "secp256k1", signed_proof(verifier, signer))
+
+def test_each_did_keeps_only_its_newest_challenges(verifier):
+    signer = Ed25519Signer()
+    proofs = [signed_proof(verifier, signer) for _ in range(app_module.DID_CHALLENGES_PER_DID + 1)]
+    assert not verifier.verify(signer.did, signer.method, proofs[0])
+    assert all(verifier.verify(signer.did, signer.method, proof) for proof in proofs[1:])
+
+def test_full_challenge_store_refuses_issuance_instead_of_evicting(verifier):
+    signer = Ed25519Signer()
+    verifier.challenges.max_size = 3
+    proof = signed_proof(verifier, signer)
+    assert verifier.admit("flooder", 2) is None
+    for i in range(2):
+        verifier.issue_challenge(f"did:key:zFlood{i}")
+
+    assert verifier.admit("flooder", 1) is not None
+    assert verifier.verify(signer.did, signer.method, proof)
+
+def test_challenge_issuance_is_rate_limited_per_caller(client, verifier, monkeypatch):
+    # Slow refill so the second request cannot be let through by time elapsed during the first
+    monkeypatch.setattr(app_module, "DID_CHALLENGE_RATE", 0.01)
+    dids = [f"did:key:zCaller{i}" for i in range(app_module.DID_CHALLENGE_BURST)]
+    assert client.post("/identity/challenge", json={"dids": dids}).status_code == 200
+
+    response = client.post("/identity/challenge", json={"dids": ["did:key:zOneMore"]})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert verifier.stats["issue_rejections"] == 1
+
+def test_challenge_and_verify_endpoints(client, verifier):
+    signer = Ed25519Signer()
+    issued = client.post("/identity/challenge", json={"dids": [signer.did]}).json()["challenges"][0]
+    assert issued["did"] == signer.did
+
+    body = {
+        "did": signer.did,
+        "verification_method": signer.method,
+        "proof": {"challenge": issued["challenge"], "signature": signer.sign(issued["challenge"])}
+    }
+    assert client.post("/identity/verify", json=body).json()["verified"] is True
+    assert client.post("/identity/verify", json=body).json()["verified"] is False
@@ -0,0 +1,147 @@
+import time
+
+import httpx
+import stripe
+
+import app as app_module
+from conftest import MOCK_STRIPE_PORT
+from load_api import encrypt_pitch, sample_pitch
+
+class CountingRedis:
+    """Just enough of the redis client for EntitlementStore.resolve, counting reads"""
+
+    def __init__(self):
+        self.reads = 0
+
+    def hgetall(self, key):
+        self.reads += 1
+        return {}
+
+def score(client, i, token=None, forwarded_for=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    if forwarded_for:
+        headers["X-Forwarded-For"] = forwarded_for
+    return client.post("/score", json=encrypt_pitch(sample_pitch(i)), headers=headers)
+
+def succeed_intent(intent_id):
+    response = httpx.post(f"http://127.0.0.1:{MOCK_STRIPE_PORT}/mock/payment_intents/{intent_id}/succeeded")
+    assert response.status_code == 200
+
+def test_free_tier_quota_is_enforced(client, entitlements):
+    for i in range(app_module.FREE_TIER_QUOTA):
+        response = score(client, i)
+        assert response.status_code == 200
+        assert response.json()["tier"] == "free"
+        assert response.json()["quota_remaining"] == app_module.FREE_TIER_QUOTA - i - 1
+
+    response = score(client, 99)
+    assert response.status_code == 429
+    assert response.headers["X-Quota-Limit"] == str(app_module.FREE_TIER_QUOTA)
+    assert int(response.headers["Retry-After"]) > 0
+    assert entitlements.stats["denied"] == 1
+
+def test_callers_behind_a_trusted_proxy_are_metered_separately(client, entitlements, monkeypatch):
+    # TestClient connects from "testclient"; treat it as the reverse proxy
+    monkeypatch.setattr(app_module, "TRUSTED_PROXIES", {"testclient"})
+    for i in range(app_module.FREE_TIER_QUOTA):
+        assert score(client, i, forwarded_for="203.0.113.7").status_code == 200
+    assert score(client, 99, forwarded_for="203.0.113.7").status_code == 429
+
+    response = score(client, 0, forwarded_for="203.0.113.7, 198.51.100.20")
+    assert response.status_code == 200
+    assert response.json()["quota_remaining"] == app_module.FREE_TIER_QUOTA - 1
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(client, entitlements):
+    for i in range(app_module.FREE_TIER_QUOTA):
+        assert score(client, i, forwarded_for=f"198.51.100.{i}").status_code == 200
+    assert score(client, 99, forwarded_for="198.51.100.99").status_code == 429
+
+def test_paid_tier_is_unmetered(client, entitlements):
+    entitlements.grant("sub_test_pro", "pro", int(time.time()) + 3600)
+    for i in range(app_module.FREE_TIER_QUOTA + 2):
+        response = score(client, i, token="sub_test_pro")
+        assert response.status_code == 200
+        assert response.json()["tier"] == "pro"
+        assert response.json()["quota_remaining"] is None
+
+def test_expired_subscription_falls_back_to_free_quota(client, entitlements):
+    entitlements.grant("sub_test_expired", "pro", int(time.time()) - 1)
+    response = score(client, 0, token="sub_test_expired")
+    assert response.status_code == 200
+    assert response.json()["tier"] == "free"
+    assert response.json()["quota_remaining"] == app_module.FREE_TIER_QUOTA - 1
+
+def test_unknown_subscription_is_rejected(client, entitlements):
+    response = score(client, 0, token="sub_does_not_exist")
+    assert response.status_code == 401
+    assert entitlements.local_usage == {}
+
+def test_unknown_subscription_is_negatively_cached(client, entitlements, monkeypatch):
+    fake_redis = CountingRedis()
+    monkeypatch.setattr(app_module, "redis_client", fake_redis)
+
+    for i in range(3):
+        assert score(client, i, token="sub_does_not_exist").status_code == 401
+
+    assert fake_redis.reads == 1
+    assert entitlements.stats["redis_reads"] == 1
+    assert entitlements.cache.get(entitlements.token_key("sub_does_not_exist")) is entitlements.MISSING
+
+def test_quota_is_refunded_when_evaluation_fails(client, entitlements, monkeypatch):
+    async def failing_evaluator(pitch_text, use_federated=True):
+        raise app_module.HTTPException(status_code=502, detail="Evaluator unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(app_module, "call_ai_evaluator", failing_evaluator)
+        for i in range(app_module.FREE_TIER_QUOTA + 1):
+            assert score(client, i).status_code == 502
+
+    assert entitlements.stats["refunds"] == app_module.FREE_TIER_QUOTA + 1
+    for i in range(app_module.FREE_TIER_QUOTA):
+        assert score(client, i).status_code == 200
+    assert score(client, 99).status_code == 429
+
+def test_quota_is_refunded_on_unexpected_errors(client, entitlements, monkeypatch):
+    async def broken_evaluator(pitch_text, use_federated=True):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(app_module, "call_ai_evaluator", broken_evaluator)
+    assert score(client, 0).status_code == 500
+    assert entitlements.stats["refunds"] == 1
+    assert sum(entitlements.local_usage.values()) == 0
+
+def test_payment_activates_tier_with_hashed_random_token(client, entitlements, stripe_mock):
+    created = client.post("/create-payment-intent", json={"tier_id": "enterprise", "amount": 50, "currency": "usd"})
+    assert created.status_code == 200
+    # Client-supplied amounts are ignored; the price comes from the server's table
+    assert (created.json()["amount"], created.json()["currency"]) == app_module.TIER_PRICES["enterprise"]
+
+    intent_id = created.json()["payment_intent_id"]
+    succeed_intent(intent_id)
+    confirmed = client.post("/confirm-payment", json={"payment_intent_id": intent_id})
+    assert confirmed.status_code == 200
+    token = confirmed.json()["subscription_id"]
+    assert confirmed.json()["success"] and token.startswith("sub_")
+
+    assert token not in entitlements.local_entitlements
+    assert entitlements.token_key(token) in entitlements.local_entitlements
+
+    response = score(client, 0, token=token)
+    assert response.status_code == 200
+    assert response.json()["tier"] == "enterprise"
+
+    # Confirming again returns the same subscription rather than minting another token
+    again = client.post("/confirm-payment", json={"payment_intent_id": intent_id})
+    assert again.json()["subscription_id"] == token
+
+def test_underpaid_intent_does_not_activate_tier(client, entitlements, stripe_mock):
+    intent = stripe.PaymentIntent.create(amount=50, currency="usd", metadata={"tier_id": "enterprise"})
+    succeed_intent(intent.id)
+
+    response = client.post("/confirm-payment", json={"payment_intent_id": intent.id})
+    assert response.status_code == 402
+    assert entitlements.local_entitlements == {}
+
+def test_unknown_tier_is_rejected(client, stripe_mock):
+    response = client.post("/create-payment-intent", json={"tier_id": "platinum"})
+    assert response.status_code == 400
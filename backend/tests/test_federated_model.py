@@ -0,0 +1,60 @@
+import pytest
+
+import app as app_module
+
+@pytest.fixture
+def federated(monkeypatch):
+    engine = app_module.FederatedLearningEngine()
+    monkeypatch.setattr(app_module, "federated_engine", engine)
+    return engine
+
+def post_round(client, weights):
+    response = client.post("/federated/update", json=[
+        {"model_weights": weights, "client_id": "client", "privacy_budget": 0.01, "local_samples": 10}
+    ])
+    assert response.status_code == 200
+
+def test_model_etag_and_304(client, federated):
+    first = client.get("/federated/model")
+    etag = first.headers["ETag"]
+    assert client.get("/federated/model", headers={"If-None-Match": etag}).status_code == 304
+
+    post_round(client, {"clarity_weights": [0.1, 0.2, 0.3, 0.4]})
+    assert client.get("/federated/model", headers={"If-None-Match": etag}).status_code == 200
+
+def test_delta_since_version(client, federated):
+    etag = client.get("/federated/model").headers["ETag"]
+    assert client.get("/federated/model/delta", params={"since": etag}).status_code == 304
+
+    post_round(client, {"clarity_weights": [0.1, 0.2, 0.3, 0.4]})
+    delta = client.get("/federated/model/delta", params={"since": etag})
+    assert delta.status_code == 200
+    body = delta.json()
+    assert body["full"] is False and body["round_number"] == 1
+    assert body["version"] == delta.headers["ETag"] == federated.etag
+    assert set(body["changes"]) == set(federated.global_model)
+
+def test_delta_from_another_process_gets_full_weights(client, federated, monkeypatch):
+    etag = client.get("/federated/model").headers["ETag"]
+    post_round(client, {"clarity_weights": [0.1, 0.2, 0.3, 0.4]})
+
+    # Simulate a restart: round numbers start over under a new instance id
+    restarted = app_module.FederatedLearningEngine()
+    monkeypatch.setattr(app_module, "federated_engine", restarted)
+    post_round(client, {"clarity_weights": [0.4, 0.3, 0.2, 0.1]})
+
+    stale = f'"{federated.instance_id}-1"'
+    response = client.get("/federated/model/delta", params={"since": stale})
+    assert response.status_code == 200
+    assert response.json()["full"] is True
+    assert response.json()["global_weights"] == restarted.global_model
+
+    response = client.get("/federated/model/delta", params={"since": etag})
+    assert response.json()["full"] is True
+
+@pytest.mark.parametrize("since", ["1", "garbage", '"-1"'])
+def test_delta_with_unversioned_since_gets_full_weights(client, federated, since):
+    post_round(client, {"clarity_weights": [0.1, 0.2, 0.3, 0.4]})
+    response = client.get("/federated/model/delta", params={"since": since})
+    assert response.status_code == 200
+    assert response.json()["full"] is True
@@ -0,0 +1,82 @@
+import json
+import asyncio
+
+import httpx
+import pytest
+
+import app as app_module
+
+PITCH = """Problem: small online merchants lose 4% of revenue to card fraud and chargebacks every year.
+
+Solution: our product is a zero knowledge fraud scoring protocol that lets merchants share risk signals without
+sharing customer data. Unlike existing tools, the proprietary algorithm runs in the browser and needs no integration.
+
+Team: our CEO previously led risk at a payments company for 8 years. Our CTO has a PhD in cryptography and built
+the first open source prover for this circuit. Two engineers joined from major exchanges.
+
+Traction: 12 paying pilots, $40k MRR, 18% month over month growth and 94% retention since launch.
+
+Market: the fraud prevention market is $30B and growing. Customers pay per transaction scored.
+
+The ask: we are raising $2M to grow the team and ship the merchant dashboard on our roadmap."""
+
+@pytest.fixture
+def federated(monkeypatch):
+    engine = app_module.FederatedLearningEngine()
+    monkeypatch.setattr(app_module, "federated_engine", engine)
+    return engine
+
+@pytest.fixture
+def openrouter(monkeypatch):
+    """Answers every chat completion with fixed scores and counts the calls"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        content = json.dumps({"clarity": 8.0, "originality": 7.0, "team_strength": 8.5, "market_fit": 7.5})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    monkeypatch.setattr(app_module, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "openrouter_client", httpx.AsyncClient(
+        base_url="http://openrouter.test", transport=httpx.MockTransport(handler)))
+    return calls
+
+def post_update(client, weights, client_id):
+    response = client.post("/federated/update", json=[
+        {"model_weights": weights, "client_id": client_id, "privacy_budget": 0.01, "local_samples": 10}
+    ])
+    assert response.status_code == 200
+    return response.json()["global_weights"]
+
+def test_realistic_pitch_passes_prefilter(federated):
+    scores, incomplete = app_module.local_scorer.score_with_prefilter(PITCH)
+    assert not incomplete
+    assert all(score > 0 for score in scores.values())
+
+def test_partial_federated_update_does_not_zero_criteria(client, federated):
+    weights = post_update(client, {"clarity_weights": [0.1, 0.2, 0.3, 0.4]}, "partial-client")
+    assert weights["market_fit_weights"] == [0.0, 0.0, 0.0, 0.0]
+
+    scores, incomplete = app_module.local_scorer.score_with_prefilter(PITCH)
+    assert all(score > 0 for score in scores.values())
+    assert not incomplete
+
+def test_negative_federated_weights_do_not_trip_prefilter(client, federated):
+    post_update(client, {f"{criterion}_weights": [-1.0, -1.0, -1.0, -1.0] for criterion in app_module.LocalScorer.CRITERIA},
+                "negative-client")
+
+    scores, incomplete = app_module.local_scorer.score_with_prefilter(PITCH)
+    assert all(score > 0 for score in scores.values())
+    assert not incomplete
+
+def test_partial_federated_update_does_not_skip_llm(client, federated, openrouter):
+    post_update(client, {"clarity_weights": [0.1, 0.2, 0.3, 0.4]}, "partial-client")
+
+    scores, model = asyncio.run(app_module.call_ai_evaluator(PITCH))
+    assert model == app_module.MODEL_NAME
+    assert len(openrouter) == 1
+
+def test_incomplete_pitch_is_still_prefiltered(federated, openrouter):
+    scores, model = asyncio.run(app_module.call_ai_evaluator("TBD, deck coming soon"))
+    assert model == app_module.LOCAL_SCORER_MODEL
+    assert openrouter == []
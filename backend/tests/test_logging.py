@@ -0,0 +1,40 @@
+import io
+import asyncio
+import logging
+
+import httpx
+import pytest
+
+import app as app_module
+from test_local_scorer import PITCH
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    app_module.configure_logging(log_format="text", use_queue=False, stream=stream, level="INFO")
+    for log_filter in app_module.hot_logger.filters:
+        if isinstance(log_filter, app_module.HotPathFilter):
+            log_filter.buckets.clear()
+    yield stream
+    app_module.configure_logging(use_queue=False)
+
+def test_httpx_request_lines_are_dropped(log_stream):
+    assert logging.getLogger("httpx").getEffectiveLevel() == logging.WARNING
+    logging.getLogger("httpx").info('HTTP Request: POST https://openrouter.ai/api/v1/chat/completions "HTTP/1.1 200 OK"')
+    assert "HTTP Request" not in log_stream.getvalue()
+
+def test_outage_logging_is_rate_limited(log_stream, monkeypatch):
+    monkeypatch.setattr(app_module, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "openrouter_client", httpx.AsyncClient(
+        base_url="http://openrouter.test", transport=httpx.MockTransport(lambda request: httpx.Response(503))))
+
+    async def outage():
+        for _ in range(200):
+            scores, model = await app_module.call_ai_evaluator(PITCH)
+            assert model == app_module.LOCAL_SCORER_MODEL
+
+    asyncio.run(outage())
+    lines = log_stream.getvalue().splitlines()
+    burst = app_module.LOG_HOT_PATH_BURST
+    assert 0 < sum("falling back to local scorer" in line for line in lines) <= burst + 5
+    assert 0 < sum("OpenRouter API error: 503" in line for line in lines) <= burst + 5
@@ -0,0 +1,59 @@
+import pytest
+
+import app as app_module
+
+WEIGHTS = {"clarity_weights": [0.1, 0.2, 0.3, 0.4]}
+
+@pytest.fixture
+def federated(monkeypatch):
+    engine = app_module.FederatedLearningEngine()
+    monkeypatch.setattr(app_module, "federated_engine", engine)
+    return engine
+
+def update(client_id, epsilon=0.5, weights=WEIGHTS):
+    return {"model_weights": weights, "client_id": client_id, "privacy_budget": epsilon, "local_samples": 10}
+
+def test_budget_renews_each_period(monkeypatch):
+    ledger = app_module.PrivacyBudgetLedger(budget=1.0, period_seconds=60)
+    ledger.charge("client", 1.0)
+    assert not ledger.allows("client", 0.1)
+    assert ledger.lowest_remaining() == 0.0
+
+    monkeypatch.setattr(ledger, "period", ledger.period - 1)
+    assert ledger.allows("client", 1.0)
+    assert ledger.remaining("client") == 1.0
+    assert ledger.lowest_remaining() == 1.0
+
+def test_ledger_keeps_only_recent_clients():
+    ledger = app_module.PrivacyBudgetLedger(max_clients=3)
+    for i in range(10):
+        ledger.charge(f"client-{i}", 0.1)
+    ledger.charge("client-7", 0.1)
+    ledger.charge("client-10", 0.1)
+
+    assert list(ledger.spent) == ["client-9", "client-7", "client-10"]
+    assert ledger.evictions == 8
+    assert ledger.total_spent == pytest.approx(1.2)
+
+def test_failed_aggregation_spends_nothing(client, federated):
+    bad = update("client-a", weights={"clarity_weights": [0.1, 0.2]})
+    assert client.post("/federated/update", json=[bad]).status_code == 500
+    assert federated.privacy_ledger.remaining("client-a") == federated.privacy_ledger.budget
+    assert federated.round_number == 0
+
+def test_budget_is_tracked_but_not_enforced_by_default(client, federated):
+    for expected in (0.5, 0.0, 0.0):
+        response = client.post("/federated/update", json=[update("client-b")])
+        assert response.status_code == 200
+        assert response.json()["privacy_budget_remaining"] == expected
+
+def test_enforced_budget_drops_over_budget_updates(client, federated, monkeypatch):
+    monkeypatch.setattr(app_module, "PRIVACY_BUDGET_ENFORCED", True)
+
+    # Two updates from the same client in one batch count against the same budget
+    response = client.post("/federated/update", json=[update("client-c", 0.6), update("client-c", 0.6), update("client-d")])
+    assert response.status_code == 200
+    assert federated.privacy_ledger.remaining("client-c") == pytest.approx(0.4)
+    assert federated.participants == ["client-c", "client-d"]
+
+    assert client.post("/federated/update", json=[update("client-c", 0.6)]).status_code == 429
@@ -0,0 +1,162 @@
+import math
+import time
+import hashlib
+
+import pytest
+
+import app as app_module
+
+WINDOW_SECONDS = 60
+
+class Clock:
+    """Stands in for the `time` module inside app so windows can be opened and sealed on demand"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float = WINDOW_SECONDS):
+        self.now += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Start at the beginning of a window so one advance always crosses exactly one boundary
+    fake = Clock(float(int(time.time()) // WINDOW_SECONDS * WINDOW_SECONDS))
+    monkeypatch.setattr(app_module, "time", fake)
+    return fake
+
+@pytest.fixture
+def accumulator(clock, monkeypatch):
+    acc = app_module.ReceiptAccumulator(window_seconds=WINDOW_SECONDS, retention=2)
+    monkeypatch.setattr(app_module, "receipt_accumulator", acc)
+    return acc
+
+def receipts(n, prefix="receipt"):
+    return [hashlib.sha256(f"{prefix}-{i}".encode()).hexdigest() for i in range(n)]
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 8, 16])
+def test_proofs_round_trip(accumulator, clock, size):
+    batch = receipts(size)
+    for receipt in batch:
+        accumulator.add(receipt)
+    clock.advance()
+    accumulator.roll()
+
+    roots = set()
+    for index, receipt in enumerate(batch):
+        proof = accumulator.proof(receipt)
+        assert proof["leaf_index"] == index
+        assert proof["window_size"] == size
+        assert len(proof["proof"]) <= math.ceil(math.log2(size))
+        assert accumulator.verify(receipt, proof["proof"], proof["root"])
+        roots.add(proof["root"])
+    assert len(roots) == 1
+
+def test_odd_trailing_node_is_promoted(accumulator, clock):
+    batch = receipts(3)
+    for receipt in batch:
+        accumulator.add(receipt)
+    clock.advance()
+    accumulator.roll()
+
+    leaves = [accumulator.leaf_hash(receipt) for receipt in batch]
+    expected = accumulator.node_hash(accumulator.node_hash(leaves[0], leaves[1]), leaves[2])
+    assert accumulator.proof(batch[0])["root"] == expected.hex()
+    assert accumulator.proof(batch[2])["proof"] == [{"hash": accumulator.node_hash(leaves[0], leaves[1]).hex(), "position": "left"}]
+
+def test_single_receipt_root_is_its_leaf(accumulator, clock):
+    receipt = receipts(1)[0]
+    accumulator.add(receipt)
+    clock.advance()
+    accumulator.roll()
+
+    proof = accumulator.proof(receipt)
+    assert proof["proof"] == []
+    assert proof["root"] == accumulator.leaf_hash(receipt).hex()
+
+def test_tampered_proofs_fail(accumulator, clock):
+    batch = receipts(5)
+    for receipt in batch:
+        accumulator.add(receipt)
+    clock.advance()
+    accumulator.roll()
+
+    proof = accumulator.proof(batch[1])
+    assert not accumulator.verify(batch[2], proof["proof"], proof["root"])
+    assert not accumulator.verify(batch[1], proof["proof"], "00" * 32)
+
+    flipped = [dict(step, position="right" if step["position"] == "left" else "left") for step in proof["proof"]]
+    assert not accumulator.verify(batch[1], flipped, proof["root"])
+    assert not accumulator.verify(batch[1], proof["proof"][:-1], proof["root"])
+
+def test_proof_endpoint_conflicts_while_window_is_open(client, accumulator, clock):
+    receipt = receipts(1)[0]
+    accumulator.add(receipt)
+
+    response = client.get(f"/receipts/{receipt}/proof")
+    assert response.status_code == 409
+    assert 0 < int(response.headers["Retry-After"]) <= WINDOW_SECONDS
+
+    clock.advance()
+    response = client.get(f"/receipts/{receipt}/proof")
+    assert response.status_code == 200
+    proof = response.json()
+
+    verified = client.post("/receipts/verify", json={"receipt": receipt, "proof": proof["proof"], "root": proof["root"]})
+    assert verified.json() == {"valid": True, "root_known": True, "window_id": proof["window_id"]}
+
+def test_unknown_receipt_has_no_proof(client, accumulator):
+    assert client.get(f"/receipts/{receipts(1, 'unknown')[0]}/proof").status_code == 404
+
+def test_expired_windows_are_forgotten(client, accumulator, clock):
+    first = receipts(2, "first")
+    for receipt in first:
+        accumulator.add(receipt)
+    clock.advance()
+    old_proof = client.get(f"/receipts/{first[0]}/proof").json()
+
+    # Retention is two windows: sealing two more evicts the first
+    for label in ("second", "third"):
+        for receipt in receipts(2, label):
+            accumulator.add(receipt)
+        clock.advance()
+        accumulator.roll()
+
+    assert client.get(f"/receipts/{first[0]}/proof").status_code == 404
+    assert old_proof["root"] not in accumulator.root_index
+    verified = client.post("/receipts/verify", json={"receipt": first[0], "proof": old_proof["proof"], "root": old_proof["root"]})
+    assert verified.json()["root_known"] is False
+    assert client.get(f"/receipts/{receipts(2, 'third')[0]}/proof").status_code == 200
+
+def test_malformed_proof_hash_is_rejected(client, accumulator):
+    receipt = receipts(1)[0]
+    bad_step = {"hash": "not-hex", "position": "left"}
+    response = client.post("/receipts/verify", json={"receipt": receipt, "proof": [bad_step], "root": "00" * 32})
+    assert response.status_code == 422
+    assert not accumulator.verify(receipt, [bad_step], "00" * 32)
+
+def test_receipt_repeated_in_later_window_survives_first_window_expiry(client, accumulator, clock):
+    repeated = receipts(1, "repeated")[0]
+    accumulator.add(repeated)
+    clock.advance()
+    accumulator.add(repeated)
+    for receipt in receipts(3, "filler"):
+        accumulator.add(receipt)
+    clock.advance()
+    accumulator.roll()
+    latest = accumulator.proof(repeated)
+
+    # A third sealed window pushes the first one out of the two-window retention
+    accumulator.add(receipts(1, "later")[0])
+    clock.advance()
+    accumulator.roll()
+
+    response = client.get(f"/receipts/{repeated}/proof")
+    assert response.status_code == 200
+    assert response.json()["window_id"] == latest["window_id"]
+    assert accumulator.verify(repeated, response.json()["proof"], response.json()["root"])
@@ -0,0 +1,133 @@
+import time
+import asyncio
+import hashlib
+
+import pytest
+from web3 import Web3
+
+import app as app_module
+
+# eth-tester funds accounts derived from private keys 1..10; this is the first
+TESTER_KEY = "0x" + "00" * 31 + "01"
+
+@pytest.fixture
+def w3():
+    return Web3(Web3.EthereumTesterProvider())
+
+@pytest.fixture(autouse=True)
+def accumulator(monkeypatch):
+    acc = app_module.ReceiptAccumulator(window_seconds=60, retention=10)
+    monkeypatch.setattr(app_module, "receipt_accumulator", acc)
+    return acc
+
+def unavailable(tx):
+    raise ConnectionError("node unavailable")
+
+def make_anchor(w3, **kwargs):
+    kwargs.setdefault("sender_account", w3.eth.accounts[0])
+    return app_module.ReceiptAnchor(w3, interval=10, max_batch=2, private_key=kwargs.pop("private_key", None), **kwargs)
+
+def roots(n):
+    return [(window_id, hashlib.sha256(f"root-{window_id}".encode()).hexdigest()) for window_id in range(n)]
+
+def anchored(w3, tx_hash):
+    tx = w3.eth.get_transaction(tx_hash)
+    data = bytes(tx["input"])
+    assert data[:4] == app_module.ReceiptAnchor.MAGIC
+    return tx, data[4:36].hex(), [data[i:i + 32].hex() for i in range(36, len(data), 32)]
+
+def test_requires_an_explicit_signer(w3):
+    with pytest.raises(ValueError):
+        app_module.ReceiptAnchor(w3, private_key=None, sender_account=None)
+
+def test_batches_roots_with_consecutive_nonces(w3):
+    anchor = make_anchor(w3)
+    for window_id, root in roots(5):
+        anchor.enqueue(window_id, root)
+
+    tx_hashes = [asyncio.run(anchor.flush()) for _ in range(3)]
+    assert asyncio.run(anchor.flush()) is None
+
+    sent = [anchored(w3, tx_hash) for tx_hash in tx_hashes]
+    assert [tx["nonce"] for tx, _, _ in sent] == [0, 1, 2]
+    assert [batch for _, _, batch in sent] == [[root for _, root in roots(5)[i:i + 2]] for i in (0, 2, 4)]
+    for tx, aggregate, batch in sent:
+        assert tx["from"] == w3.eth.accounts[0]
+        leaves = [bytes.fromhex(root) for root in batch]
+        assert aggregate == app_module.receipt_accumulator._build_levels(leaves)[-1][0].hex()
+
+    assert anchor.stats["anchored_batches"] == 3 and anchor.stats["anchored_roots"] == 5
+    assert [entry["windows"] for entry in anchor.history] == [[0, 1], [2, 3], [4]]
+
+def test_signs_locally_with_private_key(w3):
+    anchor = make_anchor(w3, private_key=TESTER_KEY, sender_account=None)
+    anchor.enqueue(0, roots(1)[0][1])
+    tx, _, _ = anchored(w3, asyncio.run(anchor.flush()))
+    assert tx["from"] == anchor.sender == w3.eth.accounts[0]
+
+def test_failed_submission_requeues_with_backoff(w3, monkeypatch):
+    anchor = make_anchor(w3)
+    for window_id, root in roots(3):
+        anchor.enqueue(window_id, root)
+    assert asyncio.run(anchor.flush()) is not None
+
+    with monkeypatch.context() as patch:
+        patch.setattr(w3.eth, "send_transaction", unavailable)
+        before = time.monotonic()
+        assert asyncio.run(anchor.flush()) is None
+
+    assert list(anchor.pending) == roots(3)[2:]
+    assert anchor.failures == 1 and anchor.stats["failed_attempts"] == 1
+    assert anchor.nonce is None
+    assert anchor.next_attempt_at >= before + anchor.interval * 2
+
+    # Still backing off: a scheduled flush does nothing, a forced one (shutdown drain) goes through
+    assert asyncio.run(anchor.flush()) is None
+    tx, _, batch = anchored(w3, asyncio.run(anchor.flush(force=True)))
+    assert tx["nonce"] == 1
+    assert batch == [roots(3)[2][1]]
+    assert anchor.failures == 0 and not anchor.pending
+
+def test_backoff_grows_and_is_capped(w3, monkeypatch):
+    anchor = make_anchor(w3)
+    monkeypatch.setattr(app_module, "ANCHOR_MAX_BACKOFF_SECONDS", 35)
+    monkeypatch.setattr(w3.eth, "send_transaction", unavailable)
+    anchor.enqueue(0, roots(1)[0][1])
+
+    waits = []
+    for _ in range(3):
+        asyncio.run(anchor.flush(force=True))
+        waits.append(anchor.next_attempt_at - time.monotonic())
+    assert [round(wait) for wait in waits] == [20, 35, 35]
+    assert list(anchor.pending) == roots(1)
+
+def test_drain_anchors_everything_pending(w3):
+    anchor = make_anchor(w3)
+    for window_id, root in roots(5):
+        anchor.enqueue(window_id, root)
+    asyncio.run(anchor.drain())
+    assert not anchor.pending
+    assert anchor.stats["anchored_batches"] == 3
+    assert w3.eth.get_transaction_count(w3.eth.accounts[0]) == 3
+
+def test_cancelled_flush_still_records_the_in_flight_batch(w3, monkeypatch):
+    anchor = make_anchor(w3)
+    send_transaction = w3.eth.send_transaction
+
+    def slow_send(tx):
+        time.sleep(0.2)
+        return send_transaction(tx)
+
+    monkeypatch.setattr(w3.eth, "send_transaction", slow_send)
+    anchor.enqueue(0, roots(1)[0][1])
+
+    async def cancel_mid_submission():
+        task = asyncio.create_task(anchor.flush())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_mid_submission())
+    assert anchor.stats["anchored_batches"] == 1 and not anchor.pending
+    assert anchor.nonce == 1
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import subprocess
+
+import pytest
+
+import app as app_module
+
+def receipt(label="receipt"):
+    return hashlib.sha256(label.encode()).hexdigest()
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "receipt writer did not catch up"
+        time.sleep(0.01)
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Keep retries fast so the test does not sit in the backoff
+    monkeypatch.setattr(app_module.ReceiptStore, "WRITE_RETRY_MAX_SECONDS", 0.05)
+    receipt_store = app_module.ReceiptStore(path=str(tmp_path / "receipts.db"), capacity=1000)
+    receipt_store.load_bloom()
+    yield receipt_store
+    receipt_store.close()
+
+def test_import_opens_nothing(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "RECEIPT_STORE_PATH"}
+    env["PYTHONPATH"] = app_module.__file__.rsplit(os.sep, 1)[0]
+    script = "import threading, app; assert app.receipt_store is None; print(sorted(t.name for t in threading.enumerate()))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "receipt-store-writer" not in result.stdout
+    assert not (tmp_path / "receipts.db").exists()
+
+def test_failed_write_stays_findable_and_is_retried(store):
+    broken = sqlite3.connect(store.path)
+    broken.execute("DROP TABLE receipts")
+    broken.commit()
+
+    failing = receipt("failing")
+    store.record(failing, "local", {"clarity": 7.0})
+    wait_for(lambda: store.stats["write_errors"] >= 2)
+    assert store.lookup(failing)["model"] == "local"
+
+    broken.execute(store.SCHEMA)
+    broken.commit()
+    broken.close()
+    wait_for(lambda: not store.pending)
+
+    assert store.stats["writes"] == 1
+    with sqlite3.connect(store.path) as connection:
+        assert connection.execute("SELECT model FROM receipts WHERE receipt = ?", (bytes.fromhex(failing),)).fetchone() == ("local",)
+
+def test_close_reports_unpersisted_receipts(tmp_path, caplog):
+    store = app_module.ReceiptStore(path=str(tmp_path / "receipts.db"), capacity=1000)
+    with sqlite3.connect(store.path) as connection:
+        connection.execute("DROP TABLE receipts")
+    store.record(receipt("lost"), "local", {"clarity": 7.0})
+    wait_for(lambda: store.stats["write_errors"] >= 1)
+
+    started = time.monotonic()
+    store.close()
+    assert time.monotonic() - started < 5
+    assert bytes.fromhex(receipt("lost")) in store.pending
+    assert "1 receipts not persisted" in caplog.text
@@ -0,0 +1,133 @@
+import json
+import time
+import uuid
+import asyncio
+
+import stripe
+
+import app as app_module
+from mock_stripe import sign_webhook
+
+def intent_payload(tier_id="pro", amount=None):
+    price, currency = app_module.TIER_PRICES[tier_id]
+    return {
+        "id": f"pi_test_{uuid.uuid4().hex[:24]}",
+        "object": "payment_intent",
+        "status": "succeeded",
+        "amount": price if amount is None else amount,
+        "currency": currency,
+        "client_secret": None,
+        "metadata": {"tier_id": tier_id, "customer_email": "founder@example.com"}
+    }
+
+def webhook(intent, event_id=None, event_type="payment_intent.succeeded", secret="whsec_mock"):
+    payload = json.dumps({
+        "id": event_id or f"evt_test_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()),
+        "data": {"object": intent}
+    })
+    return payload, {"Content-Type": "application/json", "Stripe-Signature": sign_webhook(payload, secret)}
+
+def deliver(client, payload, headers):
+    return client.post("/stripe/webhook", content=payload, headers=headers)
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "webhook worker did not catch up"
+        time.sleep(0.01)
+
+def test_signed_webhook_activates_subscription(client, entitlements):
+    intent = intent_payload("pro")
+    processed = app_module.stripe_gateway.stats["webhooks_processed"]
+    assert deliver(client, *webhook(intent)).status_code == 200
+
+    wait_for(lambda: app_module.stripe_gateway.stats["webhooks_processed"] > processed)
+    subscription = app_module.stripe_gateway.subscriptions.get(intent["id"])
+    assert subscription["tier_id"] == "pro"
+    assert entitlements.token_key(subscription["subscription_id"]) in entitlements.local_entitlements
+
+def test_bad_signature_is_rejected(client):
+    payload, headers = webhook(intent_payload(), secret="whsec_wrong")
+    assert deliver(client, payload, headers).status_code == 400
+
+def test_underpaid_webhook_does_not_activate(client, entitlements):
+    intent = intent_payload("enterprise", amount=50)
+    processed = app_module.stripe_gateway.stats["webhooks_processed"]
+    assert deliver(client, *webhook(intent)).status_code == 200
+
+    wait_for(lambda: app_module.stripe_gateway.stats["webhooks_processed"] > processed)
+    assert app_module.stripe_gateway.subscriptions.get(intent["id"]) is None
+    assert entitlements.local_entitlements == {}
+
+def test_duplicate_event_is_applied_once(client, entitlements):
+    intent = intent_payload("pro")
+    payload, headers = webhook(intent)
+    stats = app_module.stripe_gateway.stats
+    processed, duplicates = stats["webhooks_processed"], stats["webhooks_duplicate"]
+
+    assert deliver(client, payload, headers).status_code == 200
+    wait_for(lambda: stats["webhooks_processed"] > processed)
+    assert deliver(client, payload, headers).status_code == 200
+
+    assert stats["webhooks_duplicate"] == duplicates + 1
+    assert stats["webhooks_processed"] == processed + 1
+    assert len(entitlements.local_entitlements) == 1
+
+def test_failed_event_is_applied_on_redelivery(client, entitlements, monkeypatch):
+    gateway = app_module.stripe_gateway
+    apply_event = gateway.apply_event
+    calls = []
+
+    def flaky_apply(event):
+        calls.append(event.id)
+        if len(calls) == 1:
+            raise RuntimeError("transient failure")
+        apply_event(event)
+
+    monkeypatch.setattr(gateway, "apply_event", flaky_apply)
+    intent = intent_payload("pro")
+    payload, headers = webhook(intent)
+    failed = gateway.stats["webhooks_failed"]
+
+    assert deliver(client, payload, headers).status_code == 200
+    wait_for(lambda: gateway.stats["webhooks_failed"] > failed)
+    assert gateway.subscriptions.get(intent["id"]) is None
+
+    assert deliver(client, payload, headers).status_code == 200
+    wait_for(lambda: gateway.subscriptions.get(intent["id"]) is not None)
+    assert len(calls) == 2
+
+def test_drain_applies_queued_events_before_shutdown():
+    async def scenario():
+        gateway = app_module.StripeGateway(max_workers=1)
+        applied = []
+        gateway.apply_event = lambda event: applied.append(event.id)
+        events = []
+        for _ in range(3):
+            payload, headers = webhook(intent_payload())
+            event = stripe.Webhook.construct_event(payload, headers["Stripe-Signature"], "whsec_mock")
+            events.append(event.id)
+            assert gateway.enqueue_event(event)
+
+        assert not await gateway.drain(timeout=0.05)
+        worker = asyncio.create_task(gateway.process_events())
+        assert await gateway.drain(timeout=1)
+        worker.cancel()
+        gateway.shutdown()
+        return events, applied
+
+    events, applied = asyncio.run(scenario())
+    assert applied == events
+
+def test_idempotency_key_is_scoped_to_the_request(client, stripe_mock):
+    key = f"test-{uuid.uuid4().hex}"
+    first = client.post("/create-payment-intent", json={"tier_id": "pro"}, headers={"Idempotency-Key": key})
+    replay = client.post("/create-payment-intent", json={"tier_id": "pro"}, headers={"Idempotency-Key": key})
+    assert first.status_code == replay.status_code == 200
+    assert first.json()["payment_intent_id"] == replay.json()["payment_intent_id"]
+
+    mismatch = client.post("/create-payment-intent", json={"tier_id": "enterprise"}, headers={"Idempotency-Key": key})
+    assert mismatch.status_code == 400
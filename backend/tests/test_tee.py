@@ -0,0 +1,27 @@
+
+import app as app_module
+
+def test_streamed_execution_matches_buffered(client):
+    payload = b"encrypted pitch bytes " * 5000
+    streamed = client.post("/tee/execute/stream", content=payload)
+    assert streamed.status_code == 200
+    assert streamed.json()["privacy_guarantees"] == app_module.TEE_PRIVACY_GUARANTEES
+
+    buffered = client.post("/tee/execute", json={"encrypted_data": payload.decode(), "computation_type": "pitch_analysis"})
+    assert buffered.json()["privacy_guarantees"] == streamed.json()["privacy_guarantees"]
+
+def test_chunked_upload_is_accepted(client):
+    response = client.post("/tee/execute/stream", content=iter([b"chunk-one", b"chunk-two"]))
+    assert response.status_code == 200
+
+def test_non_numeric_content_length_is_a_client_error(client):
+    response = client.post("/tee/execute/stream", content=b"payload", headers={"Content-Length": "abc"})
+    assert response.status_code == 400
+
+def test_oversized_upload_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(app_module, "TEE_MAX_UPLOAD_BYTES", 16)
+    assert client.post("/tee/execute/stream", content=b"x" * 17).status_code == 413
+    assert client.post("/tee/execute/stream", content=iter([b"x" * 10, b"x" * 10])).status_code == 413
+
+def test_empty_upload_is_rejected(client):
+    assert client.post("/tee/execute/stream", content=b"").status_code == 400